@@ -16,6 +16,12 @@ from app.models.user import User
 from app.models.product import Product
 from app.models.cart import CartItem
 from app.models.order import Order
+from app.models.cep_cache import CepCache
+from app.models.outbox import PaymentOutbox
+from app.models.webhook_inbox import WebhookInbox
+from app.models.reservation import StockReservation
+from app.models.product_image import ProductImage
+from app.models.catalog_version import CatalogVersion
 
 config = context.config
 
@@ -24,6 +30,18 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Busca textual (revisão 0007): coluna gerada e índice GIN no Postgres, tabela
+# FTS5 (e as tabelas-sombra dela) no SQLite. Criados por SQL, fora dos modelos;
+# sem isto o autogenerate/alembic check proporia removê-los
+SEARCH_OBJECTS = {("column", "search_vector"), ("index", "ix_products_search_vector")}
+
+def include_object(object, name, type_, reflected, compare_to):
+    if (type_, name) in SEARCH_OBJECTS:
+        return False
+    if type_ == "table" and name.startswith("products_fts"):
+        return False
+    return True
+
 def get_url():
     return os.getenv("DATABASE_URL")
 
@@ -34,6 +52,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -50,7 +69,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
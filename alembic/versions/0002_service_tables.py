@@ -0,0 +1,125 @@
+"""tabelas das filas e caches: cep_cache, payment_outbox, webhook_inbox,
+stock_reservations, product_images
+
+Vieram antes da série de migrações e eram criadas pelo create_all do
+startup. Cada tabela só é criada se ainda não existe: um banco que passou
+por um desses deploys intermediários (com parte delas) sobe daqui sem erro.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'cep_cache' not in existing:
+        op.create_table('cep_cache',
+        sa.Column('cep', sa.String(length=8), nullable=False),
+        sa.Column('endereco', sa.JSON(), nullable=True),
+        sa.Column('found', sa.Boolean(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('cep')
+        )
+        op.create_index(op.f('ix_cep_cache_expires_at'), 'cep_cache', ['expires_at'], unique=False)
+    if 'payment_outbox' not in existing:
+        op.create_table('payment_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('order_id')
+        )
+        op.create_index(op.f('ix_payment_outbox_id'), 'payment_outbox', ['id'], unique=False)
+        op.create_index(op.f('ix_payment_outbox_next_attempt_at'), 'payment_outbox', ['next_attempt_at'], unique=False)
+        op.create_index(op.f('ix_payment_outbox_status'), 'payment_outbox', ['status'], unique=False)
+    if 'webhook_inbox' not in existing:
+        op.create_table('webhook_inbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dedupe_key', sa.String(), nullable=False),
+        sa.Column('topic', sa.String(), nullable=False),
+        sa.Column('resource_id', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dedupe_key')
+        )
+        op.create_index(op.f('ix_webhook_inbox_id'), 'webhook_inbox', ['id'], unique=False)
+        op.create_index(op.f('ix_webhook_inbox_next_attempt_at'), 'webhook_inbox', ['next_attempt_at'], unique=False)
+        op.create_index(op.f('ix_webhook_inbox_resource_id'), 'webhook_inbox', ['resource_id'], unique=False)
+        op.create_index(op.f('ix_webhook_inbox_status'), 'webhook_inbox', ['status'], unique=False)
+    if 'stock_reservations' not in existing:
+        op.create_table('stock_reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_stock_reservations_id'), 'stock_reservations', ['id'], unique=False)
+        op.create_index(op.f('ix_stock_reservations_order_id'), 'stock_reservations', ['order_id'], unique=False)
+        op.create_index('ix_stock_reservations_product_expires', 'stock_reservations', ['product_id', 'expires_at'], unique=False, postgresql_include=['quantidade'])
+    if 'product_images' not in existing:
+        op.create_table('product_images',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('source_hash', sa.String(length=64), nullable=False),
+        sa.Column('variants', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'position', name='uq_product_images_product_position')
+        )
+        op.create_index(op.f('ix_product_images_id'), 'product_images', ['id'], unique=False)
+        op.create_index(op.f('ix_product_images_product_id'), 'product_images', ['product_id'], unique=False)
+        op.create_index(op.f('ix_product_images_source_hash'), 'product_images', ['source_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_reservations_product_expires', table_name='stock_reservations')
+    op.drop_index(op.f('ix_stock_reservations_order_id'), table_name='stock_reservations')
+    op.drop_index(op.f('ix_stock_reservations_id'), table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    op.drop_index(op.f('ix_product_images_source_hash'), table_name='product_images')
+    op.drop_index(op.f('ix_product_images_product_id'), table_name='product_images')
+    op.drop_index(op.f('ix_product_images_id'), table_name='product_images')
+    op.drop_table('product_images')
+    op.drop_index(op.f('ix_payment_outbox_status'), table_name='payment_outbox')
+    op.drop_index(op.f('ix_payment_outbox_next_attempt_at'), table_name='payment_outbox')
+    op.drop_index(op.f('ix_payment_outbox_id'), table_name='payment_outbox')
+    op.drop_table('payment_outbox')
+    op.drop_index(op.f('ix_webhook_inbox_status'), table_name='webhook_inbox')
+    op.drop_index(op.f('ix_webhook_inbox_resource_id'), table_name='webhook_inbox')
+    op.drop_index(op.f('ix_webhook_inbox_next_attempt_at'), table_name='webhook_inbox')
+    op.drop_index(op.f('ix_webhook_inbox_id'), table_name='webhook_inbox')
+    op.drop_table('webhook_inbox')
+    op.drop_index(op.f('ix_cep_cache_expires_at'), table_name='cep_cache')
+    op.drop_table('cep_cache')
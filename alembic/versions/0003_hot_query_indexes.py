@@ -0,0 +1,77 @@
+"""índices das queries quentes: listagens, carrinho e "meus pedidos"
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 21:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# O WHERE dos índices parciais precisa casar com o que o SQLAlchemy gera
+# para "Product.is_active == True" em cada dialeto
+ACTIVE = {
+    "postgresql_where": sa.text("is_active = true"),
+    "sqlite_where": sa.text("is_active = 1"),
+}
+ACTIVE_PROMOCAO = {
+    "postgresql_where": sa.text("is_active = true AND promocao = true"),
+    "sqlite_where": sa.text("is_active = 1 AND promocao = 1"),
+}
+
+# Linhas repetidas (mesmo usuário e produto) viram uma só, somando as quantidades
+MERGE_CART_DUPLICATES = [
+    """
+    UPDATE cart_items SET quantidade = (
+        SELECT SUM(COALESCE(dup.quantidade, 1)) FROM cart_items dup
+        WHERE dup.user_id = cart_items.user_id AND dup.product_id = cart_items.product_id
+    )
+    WHERE id IN (
+        SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id HAVING COUNT(*) > 1
+    )
+    """,
+    """
+    DELETE FROM cart_items WHERE id NOT IN (
+        SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id
+    )
+    """,
+]
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_active_created', 'products', ['created_at', 'id'], unique=False, **ACTIVE)
+    op.create_index(
+        'ix_products_active_categoria_created', 'products', ['categoria', 'created_at', 'id'],
+        unique=False, **ACTIVE
+    )
+    op.create_index(
+        'ix_products_active_promocao_created', 'products', ['created_at', 'id'],
+        unique=False, **ACTIVE_PROMOCAO
+    )
+
+    for statement in MERGE_CART_DUPLICATES:
+        op.execute(statement)
+    # SQLite não tem ALTER TABLE ... ADD CONSTRAINT: o batch recria a tabela
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.create_unique_constraint('uq_cart_items_user_product', ['user_id', 'product_id'])
+
+    op.create_index(
+        'ix_orders_user_created', 'orders',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_user_created', table_name='orders')
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.drop_constraint('uq_cart_items_user_product', type_='unique')
+    op.drop_index('ix_products_active_promocao_created', table_name='products')
+    op.drop_index('ix_products_active_categoria_created', table_name='products')
+    op.drop_index('ix_products_active_created', table_name='products')
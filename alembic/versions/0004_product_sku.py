@@ -0,0 +1,27 @@
+"""products.sku: código externo usado pela importação em lote
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('sku', sa.String(), nullable=True))
+    op.create_index(op.f('ix_products_sku'), 'products', ['sku'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_products_sku'), table_name='products')
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_column('sku')
@@ -0,0 +1,58 @@
+"""SQLite: timestamps do servidor no formato que o SQLAlchemy compara
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 10:00:00.000000
+
+O default func.now() passou a gravar "AAAA-MM-DD HH:MM:SS.ffffff" no SQLite
+(ver app/database.py). Esta revisão troca o DEFAULT das tabelas existentes
+e completa os valores antigos gravados pelo CURRENT_TIMESTAMP. No Postgres
+não há nada a fazer.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# Colunas preenchidas pelo banco (server_default/onupdate func.now())
+TIMESTAMPS = {
+    'users': ('created_at', 'updated_at'),
+    'products': ('created_at', 'updated_at'),
+    'cart_items': ('created_at',),
+    'orders': ('created_at', 'updated_at'),
+    'payment_outbox': ('created_at', 'updated_at'),
+    'webhook_inbox': ('created_at', 'processed_at'),
+    'stock_reservations': ('created_at',),
+    'product_images': ('created_at',),
+}
+
+
+def _set_default(default) -> None:
+    for table in TIMESTAMPS:
+        # SQLite não altera DEFAULT: o batch recria a tabela
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                'created_at', existing_type=sa.DateTime(timezone=True), server_default=default
+            )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _set_default(sa.text("(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"))
+    for table, columns in TIMESTAMPS.items():
+        for column in columns:
+            op.execute(
+                f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _set_default(sa.text('(CURRENT_TIMESTAMP)'))
@@ -0,0 +1,88 @@
+"""catalog_version: contador do catálogo mantido por triggers (ETag entre workers)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Colunas que sobem a versão num UPDATE (None = qualquer uma). Estoque fica
+# de fora: a baixa a cada venda travaria a linha do contador até o commit
+TABLES = {
+    'products': (
+        'sku', 'nome', 'descricao', 'preco', 'imagens', 'categoria',
+        'promocao', 'preco_promocional', 'is_active',
+    ),
+    'product_images': None,
+}
+
+PG_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+SQLITE_SUFFIXES = ('ai', 'au', 'ad')
+
+
+def update_of(table):
+    columns = TABLES[table]
+    return f"UPDATE OF {', '.join(columns)}" if columns else 'UPDATE'
+
+
+def upgrade() -> None:
+    # Bancos que subiram o app com o create_all no startup já têm a tabela e
+    # os triggers antigos (que contavam o estoque): recria só os triggers
+    if not sa.inspect(op.get_bind()).has_table('catalog_version'):
+        op.create_table(
+            'catalog_version',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.execute(
+        "INSERT INTO catalog_version (id, version) "
+        "SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM catalog_version WHERE id = 1)"
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(PG_FUNCTION)
+        for table in TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}")
+            op.execute(
+                f"CREATE TRIGGER {table}_catalog_version AFTER INSERT OR {update_of(table)} OR DELETE ON {table} "
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()"
+            )
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            for suffix, operation in zip(SQLITE_SUFFIXES, ('INSERT', update_of(table), 'DELETE')):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version_{suffix}")
+                op.execute(
+                    f"CREATE TRIGGER {table}_catalog_version_{suffix} AFTER {operation} ON {table} BEGIN "
+                    "UPDATE catalog_version SET version = version + 1 WHERE id = 1; END"
+                )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}")
+        op.execute("DROP FUNCTION IF EXISTS bump_catalog_version()")
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            for suffix in SQLITE_SUFFIXES:
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version_{suffix}")
+    op.drop_table('catalog_version')
@@ -4,16 +4,27 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from app.database import get_session
 from app.models.user import User
+from app.services.cache import MISSING
+from app.services.password_hasher import PasswordHasher
+from app.services.user_cache import UserPrincipal, user_cache
 import os
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Mudar BCRYPT_ROUNDS regrava o hash de cada usuário no próximo login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12"))
+)
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+)
 security = HTTPBearer()
 
 def verify_password(plain_password, hashed_password):
@@ -32,23 +43,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return email
+        return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_current_user(email: str = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == email).first()
+async def get_current_user(payload: dict = Depends(verify_token), db=Depends(get_session)) -> UserPrincipal:
+    """Usuário autenticado (id, email, role, is_active), servido do user_cache"""
+    email = payload["sub"]
+    user_id = payload.get("user_id")
+    principal = user_cache.get(user_id, email)
+    if principal is MISSING:
+        # Só as colunas da autenticação; foto/bio ficam no banco
+        query = select(User.id, User.email, User.role, User.is_active)
+        query = query.where(User.id == user_id) if user_id is not None else query.where(User.email == email)
+        row = (await db.execute(query)).first()
+        if row is None or row.email != email:
+            raise HTTPException(status_code=401, detail="User not found")
+
+        principal = UserPrincipal(row.id, row.email, row.role, row.is_active)
+        user_cache.set(user_id, email, principal)
+
+    # Desativado: o token continua válido até expirar, o acesso não (NULL de
+    # linhas antigas conta como ativo, como antes)
+    if principal.is_active is False:
+        raise HTTPException(status_code=401, detail="Inactive user")
+    return principal
+
+async def get_current_user_row(current_user: UserPrincipal = Depends(get_current_user), db=Depends(get_session)) -> User:
+    """Linha completa do usuário, para os handlers que leem perfil/foto"""
+    user = await db.get(User, current_user.id)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
-def require_admin(current_user: User = Depends(get_current_user)):
+def require_admin(current_user: UserPrincipal = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
\ No newline at end of file
+    return current_user
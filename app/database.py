@@ -1,6 +1,10 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.functions import now
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 
@@ -8,8 +12,17 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Modo de acesso ao banco: "sync" (psycopg2 + threadpool) ou "async" (asyncpg)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+ASYNC_DB = DB_MODE == "async"
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+IS_SQLITE = bool(DATABASE_URL) and DATABASE_URL.startswith("sqlite")
+
 # Configurar SSL para PostgreSQL no Render
-if DATABASE_URL:
+if DATABASE_URL and not IS_SQLITE:
     # Se a URL já tem parâmetros SSL, não adicionar novamente
     if "sslmode" not in DATABASE_URL:
         if "?" in DATABASE_URL:
@@ -26,22 +39,169 @@ if DATABASE_URL and "render.com" in DATABASE_URL:
         "application_name": "moda_karina_store"
     }
 
+# O SyncSessionAdapter usa a mesma sessão em threads diferentes do threadpool
+# (uma de cada vez); o sqlite3 recusa isso por padrão
+if IS_SQLITE:
+    connect_args = {"check_same_thread": False}
+
+pool_args = {}
+if not IS_SQLITE:
+    pool_args = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+    }
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=3600,  # 1 hora
-    pool_size=5,
-    max_overflow=10,
-    connect_args=connect_args
+    connect_args=connect_args,
+    **pool_args
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False como no AsyncSession: ler um atributo depois do commit
+# não pode disparar um SELECT fora do threadpool (no event loop)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # O CURRENT_TIMESTAMP do SQLite grava "2026-01-01 12:00:00", mas o SQLAlchemy
+    # grava e compara datetimes como "2026-01-01 12:00:00.000000". Como o SQLite
+    # compara texto, os dois formatos juntos quebram o cursor por (created_at, id);
+    # func.now() passa a gravar no mesmo formato (com milissegundos)
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_async_url(url):
+    """Converte a DATABASE_URL síncrona para o driver asyncpg.
+
+    O asyncpg não entende o parâmetro ``sslmode`` da URL; ele é removido e
+    repassado via ``connect_args`` em ``create_async_db_engine``.
+    """
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            url = "postgresql+asyncpg://" + url[len(prefix):]
+            break
+
+    if "?" in url:
+        base, query = url.split("?", 1)
+        params = [p for p in query.split("&") if p and not p.startswith("sslmode=")]
+        url = base + ("?" + "&".join(params) if params else "")
+    return url
+
+def create_async_db_engine(url):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_connect_args = {}
+    async_pool_args = {}
+    if not url.startswith("sqlite"):
+        async_connect_args = {"ssl": "require"}
+        if "render.com" in url:
+            async_connect_args.update({
+                "timeout": 30,
+                "server_settings": {"application_name": "moda_karina_store"}
+            })
+        async_pool_args = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+        }
+
+    return create_async_engine(
+        get_async_url(url),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args=async_connect_args,
+        **async_pool_args
+    )
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async_engine = create_async_db_engine(DATABASE_URL)
+    AsyncSessionLocal = sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database mode is disabled (set DB_MODE=async)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+class SyncSessionAdapter:
+    """Expõe a API do AsyncSession sobre uma Session síncrona.
+
+    Permite que os handlers ``async def`` sejam escritos uma única vez e rodem
+    nos dois modos: no modo sync cada operação de IO vai para o threadpool.
+    Como no AsyncSession, o resultado já volta carregado (``freeze`` na
+    thread): iterar o ``Result`` no handler não toca o cursor no event loop.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def _execute_buffered(self, statement, *args, **kwargs):
+        result = self.sync_session.execute(statement, *args, **kwargs)
+        if not getattr(result, "returns_rows", True):
+            return result  # UPDATE/DELETE: só o rowcount interessa
+        return result.freeze()()
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self._execute_buffered, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity, ident):
+        return await run_in_threadpool(self.sync_session.get, entity, ident)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+async def get_sync_session(db=Depends(get_db)):
+    # Reaproveita a sessão de get_db (cacheada por request pelo FastAPI)
+    yield SyncSessionAdapter(db)
+
+# Dependência usada pelos routers async: troca de driver só pelo DB_MODE
+get_session = get_async_db if ASYNC_DB else get_sync_session
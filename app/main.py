@@ -2,19 +2,16 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import create_engine
-from app.database import Base, engine
-from app.routers import auth, produtos, carrinho, usuario, pagamento, cep, frete, webhook
+from app.middleware import BodySizeLimitMiddleware
+from app.routers import auth, produtos, carrinho, usuario, pagamento, cep, frete, webhook, blobs, admin, orders, virtual_tryon
 from app.routers.produtos import products_router
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Criar tabelas apenas se não estiver em produção
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"Warning: Could not create tables: {e}")
+# O schema vem das migrações: rode "alembic upgrade head" antes de subir o
+# app (banco criado pelo create_all antigo: ver alembic/versions/0001_baseline.py)
 
 app = FastAPI(
     title="Moda Karina Store API",
@@ -22,6 +19,17 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Limite de upload aplicado enquanto o corpo chega (antes do multipart gravar tudo);
+# a folga cobre os cabeçalhos do multipart
+MULTIPART_SLACK = 64 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/virtual-tryon/upload": int(os.getenv("TRYON_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024))) + MULTIPART_SLACK,
+        "/api/usuario/upload-foto": int(os.getenv("USER_PHOTO_MAX_BYTES", str(5 * 1024 * 1024))) + MULTIPART_SLACK
+    }
+)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,6 +44,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_payment_dispatcher():
+    # PAYMENT_DISPATCHER=0 quando o outbox é drenado por um worker dedicado
+    if os.getenv("PAYMENT_DISPATCHER", "1") == "1":
+        from app.services.payment_outbox import payment_dispatcher
+        payment_dispatcher.start()
+
+@app.on_event("startup")
+async def start_webhook_worker():
+    # WEBHOOK_WORKER=0 quando o inbox é drenado por um worker dedicado
+    if os.getenv("WEBHOOK_WORKER", "1") == "1":
+        from app.services.webhook_inbox import webhook_worker
+        webhook_worker.start()
+
+@app.on_event("startup")
+async def start_reservation_sweeper():
+    # RESERVATION_SWEEPER=0 quando outra instância já varre as reservas
+    if os.getenv("RESERVATION_SWEEPER", "1") == "1":
+        from app.services.inventory import reservation_sweeper
+        reservation_sweeper.start()
+
+@app.on_event("shutdown")
+async def stop_payment_dispatcher():
+    from app.services.payment_outbox import payment_dispatcher
+    await payment_dispatcher.stop()
+
+@app.on_event("shutdown")
+async def stop_webhook_worker():
+    from app.services.webhook_inbox import webhook_worker
+    await webhook_worker.stop()
+
+@app.on_event("shutdown")
+async def stop_reservation_sweeper():
+    from app.services.inventory import reservation_sweeper
+    await reservation_sweeper.stop()
+
+@app.on_event("shutdown")
+async def stop_image_pipeline():
+    from app.services.image_pipeline import image_pipeline
+    image_pipeline.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    from app.database import async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -90,6 +145,32 @@ def debug_db():
         "has_render_domain": "render.com" in db_url if db_url != "Not found" else False
     }
 
+# Estatísticas dos caches em memória (catálogo e CEP)
+@app.get("/debug-cache")
+def debug_cache():
+    from app.services.catalog_cache import catalog_cache
+    from app.services.cep_cache import cep_cache
+    from app.services.user_cache import user_cache
+    return {"catalog": catalog_cache.stats(), "cep": cep_cache.stats(), "users": user_cache.stats()}
+
+# Fila do hashing de senha (login/register)
+@app.get("/debug-auth")
+def debug_auth():
+    from app.auth import password_hasher
+    return password_hasher.stats()
+
+# Fila do pool de imagens (provador virtual)
+@app.get("/debug-images")
+def debug_images():
+    from app.services.image_pipeline import image_pipeline
+    return image_pipeline.stats()
+
+# Estado das chamadas externas (circuit breaker por host)
+@app.get("/debug-http")
+def debug_http():
+    from app.services.http_client import http_client
+    return http_client.stats()
+
 # Routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(produtos.router, prefix="/api")
@@ -100,6 +181,10 @@ app.include_router(pagamento.router, prefix="/api")
 app.include_router(cep.router, prefix="/api")
 app.include_router(frete.router, prefix="/api")
 app.include_router(webhook.router, prefix="/api")
+app.include_router(blobs.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(orders.router, prefix="/api")
+app.include_router(virtual_tryon.router, prefix="/api")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,72 @@
+from typing import Dict
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class BodyTooLarge(HTTPException):
+    # HTTPException: o FastAPI repassa como está em vez de virar 400 no parse do form
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body larger than {limit} bytes")
+
+class BodySizeLimitMiddleware:
+    """Limita o corpo de uploads por prefixo de rota enquanto ele chega.
+
+    O multipart do Starlette grava o arquivo inteiro antes do handler rodar;
+    aqui o ``Content-Length`` declarado é recusado na hora e um corpo
+    chunked é cortado assim que passa do limite, com 413.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def limit_for(self, path: str):
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await self.reject(send, limit)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyTooLarge(limit)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLarge:
+            if not started:
+                await self.reject(send, limit)
+
+    @staticmethod
+    async def reject(send: Send, limit: int) -> None:
+        body = f'{{"detail":"Request body larger than {limit} bytes"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
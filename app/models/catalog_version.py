@@ -0,0 +1,85 @@
+from sqlalchemy import BigInteger, Column, Integer, event, text
+from app.database import Base
+
+class CatalogVersion(Base):
+    """Contador único do catálogo (linha id=1).
+
+    Triggers em ``products`` e ``product_images`` somam 1 na mesma transação
+    de qualquer escrita que mude o que o catálogo mostra, inclusive as feitas
+    fora do ORM (importação, outro worker). É o ETag do catálogo e a versão
+    do ``catalog_cache`` em todos os processos.
+
+    Estoque fica de fora: baixa e devolução de estoque acontecem a cada
+    venda e travariam a linha do contador até o commit (checkouts em fila)
+    além de derrubar o cache inteiro. O estoque do catálogo se atualiza pelo
+    TTL do cache; carrinho e checkout conferem no banco.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# Tabela -> colunas que sobem a versão num UPDATE (None = qualquer uma).
+# Em products: o que sai no ProductOut, menos estoque e updated_at (a baixa
+# de estoque também grava updated_at)
+CATALOG_TABLES = {
+    "products": (
+        "sku", "nome", "descricao", "preco", "imagens", "categoria",
+        "promocao", "preco_promocional", "is_active",
+    ),
+    "product_images": None,
+}
+
+def _update_of(table: str) -> str:
+    columns = CATALOG_TABLES[table]
+    return f"UPDATE OF {', '.join(columns)}" if columns else "UPDATE"
+
+SEED = "INSERT INTO catalog_version (id, version) SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM catalog_version WHERE id = 1)"
+
+# Postgres: um trigger por statement (uma importação em lote soma 1, não N).
+# O UPDATE trava a linha do contador até o commit: escritas do admin no
+# catálogo se serializam nesse ponto, o que é aceitável no volume da loja
+PG_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+] + [
+    statement
+    for table in CATALOG_TABLES
+    for statement in (
+        f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}",
+        f"""
+        CREATE TRIGGER {table}_catalog_version AFTER INSERT OR {_update_of(table)} OR DELETE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+        """,
+    )
+]
+
+# SQLite só tem trigger por linha
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_catalog_version_{suffix} AFTER {operation} ON {table} BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END
+    """
+    for table in CATALOG_TABLES
+    for suffix, operation in (("ai", "INSERT"), ("au", _update_of(table)), ("ad", "DELETE"))
+]
+
+def install_triggers(connection) -> None:
+    dialect = connection.dialect.name
+    statements = {"postgresql": PG_TRIGGERS, "sqlite": SQLITE_TRIGGERS}.get(dialect, [])
+    for statement in [SEED] + statements:
+        connection.execute(text(statement))
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_after_create(target, connection, tables=(), **kw):
+    # Só quando o create_all acabou de criar a tabela (testes, benchmarks);
+    # bancos migrados recebem o mesmo pela revisão 0006
+    if any(table.name == CatalogVersion.__tablename__ for table in tables):
+        install_triggers(connection)
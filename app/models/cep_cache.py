@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Boolean, DateTime, JSON
+from app.database import Base
+
+class CepCache(Base):
+    __tablename__ = "cep_cache"
+
+    cep = Column(String(8), primary_key=True)
+    endereco = Column(JSON, nullable=True)  # None quando o CEP não existe
+    found = Column(Boolean, nullable=False, default=True)
+    expires_at = Column(DateTime, nullable=False, index=True)  # UTC
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,7 +10,7 @@ class Order(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     total = Column(Float, nullable=False)
     frete = Column(Float, default=0.0)
-    status = Column(String, default="pending")  # pending, paid, shipped, delivered, cancelled
+    status = Column(String, default="pending")  # pending, paid, shipped, delivered, cancelled, stock_conflict
     payment_id = Column(String, nullable=True)  # Mercado Pago payment ID
     payment_method = Column(String, nullable=True)
     endereco = Column(JSON, nullable=False)
@@ -18,4 +18,9 @@ class Order(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        # "Meus pedidos": filtro por usuário, mais recentes primeiro (cursor por created_at, id)
+        Index("ix_orders_user_created", user_id, created_at.desc(), id.desc()),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class PaymentOutbox(Base):
+    __tablename__ = "payment_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, unique=True)
+    payload = Column(JSON, nullable=False)  # Dados enviados ao Mercado Pago
+    status = Column(String, default="pending", index=True)  # pending, processing, done, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, index=True)  # UTC
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)  # Resposta do Mercado Pago (QR code PIX etc.)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    order = relationship("Order")
@@ -1,11 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, Index, bindparam, select
+from sqlalchemy.orm import column_property
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.reservation import StockReservation
 
 class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
+    sku = Column(String, unique=True, index=True, nullable=True)  # Código externo (importação em lote)
     nome = Column(String, nullable=False)
     descricao = Column(Text, nullable=True)
     preco = Column(Float, nullable=False)
@@ -16,4 +20,37 @@ class Product(Base):
     estoque = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Estoque menos reservas ativas; deferred para não pesar nas listagens.
+    # Use options(undefer(Product.disponivel)) onde a disponibilidade importa.
+    disponivel = column_property(
+        estoque - func.coalesce(
+            select(func.sum(StockReservation.quantidade))
+            .where(
+                StockReservation.product_id == id,
+                StockReservation.expires_at > bindparam("reservation_now", callable_=datetime.utcnow)
+            )
+            .scalar_subquery(),
+            0
+        ),
+        deferred=True
+    )
+
+    __table_args__ = (
+        # Listagens: só ativos, ordenados por (created_at, id) para o cursor.
+        # Parciais: o WHERE do índice precisa casar com o "is_active = true" das queries
+        Index(
+            "ix_products_active_created", "created_at", "id",
+            postgresql_where=is_active == True, sqlite_where=is_active == True
+        ),
+        Index(
+            "ix_products_active_categoria_created", "categoria", "created_at", "id",
+            postgresql_where=is_active == True, sqlite_where=is_active == True
+        ),
+        Index(
+            "ix_products_active_promocao_created", "created_at", "id",
+            postgresql_where=(is_active == True) & (promocao == True),
+            sqlite_where=(is_active == True) & (promocao == True)
+        ),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ProductImage(Base):
+    __tablename__ = "product_images"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # Índice em Product.imagens
+    source_hash = Column(String(64), nullable=False, index=True)  # SHA-256 da URL/data URL de origem
+    variants = Column(JSON, nullable=False)  # {"thumb": {"jpg": url, "webp": url}, "card": ..., "zoom": ...}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("product_id", "position", name="uq_product_images_product_position"),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantidade = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # UTC
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Soma das reservas ativas por produto sai só do índice (Product.disponivel)
+        Index(
+            "ix_stock_reservations_product_expires",
+            "product_id", "expires_at",
+            postgresql_include=["quantidade"]
+        ),
+    )
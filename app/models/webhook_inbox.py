@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+class WebhookInbox(Base):
+    __tablename__ = "webhook_inbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dedupe_key = Column(String, nullable=False, unique=True)  # Reenvios do Mercado Pago batem aqui
+    topic = Column(String, nullable=False)  # payment
+    resource_id = Column(String, nullable=False, index=True)  # ID do pagamento
+    payload = Column(JSON, nullable=False)
+    status = Column(String, default="pending", index=True)  # pending, processing, done, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, index=True)  # UTC
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    payload = json.dumps([created_at.isoformat() if created_at else None, id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_keyset(query, cursor: Optional[str], created_col, id_col, descending: bool = False):
+    """Ordena por (created_at, id) e continua a partir do cursor, sem OFFSET.
+
+    O Postgres resolve a comparação de row value direto no índice
+    composto, então o custo de uma página não cresce com a profundidade.
+    """
+    if descending:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col, id_col)
+
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        key = tuple_(created_col, id_col)
+        query = query.where(key < (created_at, id) if descending else key > (created_at, id))
+
+    return query
+
+def paginate_rows(rows, limit: int):
+    """Recebe ``limit + 1`` linhas; devolve a página e o cursor da próxima (ou None)"""
+    page = rows[:limit]
+    if len(rows) > limit and page:
+        last = page[-1]
+        return page, encode_cursor(last.created_at, last.id)
+    return page, None
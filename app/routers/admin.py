@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.auth import require_admin
+from app.database import get_session
+from app.services.order_export import EXPORT_FORMATS, export_statement, iter_export
+from app.utils import error_response
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/orders/export")
+async def export_orders(
+    formato: str = "csv",
+    desde: Optional[date] = None,
+    ate: Optional[date] = None,
+    status: Optional[str] = None,
+    db=Depends(get_session),
+):
+    """Exporta pedidos para a contabilidade (uma linha por item), em streaming.
+
+    ``desde``/``ate`` filtram por data de criação (inclusivas); ``status``
+    aceita vários valores separados por vírgula.
+    """
+    if formato not in EXPORT_FORMATS:
+        return error_response("Formato deve ser csv ou ndjson", 400)
+    if desde and ate and desde > ate:
+        return error_response("Período inválido", 400)
+
+    statuses = [value.strip() for value in status.split(",") if value.strip()] if status else None
+    filename = f"pedidos-{datetime.utcnow():%Y%m%d-%H%M%S}.{formato}"
+    # A sessão do request (usada pelo require_admin) só fecharia depois do
+    # download inteiro, segurando uma segunda conexão do pool; o export
+    # tem a própria sessão
+    await db.close()
+    return StreamingResponse(
+        iter_export(formato, export_statement(desde, ate, statuses)),
+        media_type=EXPORT_FORMATS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from app.database import get_db
+from app.database import get_db, get_session
 from app.models.user import User
-from app.auth import verify_password, get_password_hash, create_access_token, get_current_user
+from app.auth import create_access_token, get_current_user, get_current_user_row, password_hasher
+from app.services.password_hasher import PasswordHasherBusy
+from app.services.user_cache import UserPrincipal
+from app.services.user_photos import InvalidImage, photo_reference
 from google.auth.transport import requests
 from google.oauth2 import id_token
 import os
@@ -28,20 +32,30 @@ class UserProfile(BaseModel):
     bio: str = None
     tema_cor: str = "#000000"
 
+def hashing_busy() -> HTTPException:
+    # Backpressure: melhor recusar login do que travar o resto da API
+    return HTTPException(
+        status_code=503, detail="Authentication busy, try again", headers={"Retry-After": "1"}
+    )
+
 @router.post("/register")
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user_data.email).first():
+async def register(user_data: UserRegister, db=Depends(get_session)):
+    result = await db.execute(select(User.id).where(User.email == user_data.email))
+    if result.first():
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise hashing_busy()
     user = User(
         email=user_data.email,
         hashed_password=hashed_password,
         nome=user_data.nome
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     access_token = create_access_token(data={"sub": user.email, "user_id": user.id, "role": user.role})
     return {"success": True, "data": {"access_token": access_token, "token_type": "bearer", "user": {
@@ -49,11 +63,24 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     }}, "message": "Usuário registrado com sucesso"}
 
 @router.post("/login")
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.hashed_password):
+async def login(user_data: UserLogin, db=Depends(get_session)):
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    user = result.scalars().first()
+    if not user or not user.hashed_password:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(user_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise hashing_busy()
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    if new_hash:
+        # Custo (BCRYPT_ROUNDS) mudou: regrava o hash com a senha em mãos
+        user.hashed_password = new_hash
+        await db.commit()
+    
     access_token = create_access_token(data={"sub": user.email, "user_id": user.id, "role": user.role})
     return {"success": True, "data": {"access_token": access_token, "token_type": "bearer", "user": {
         "id": user.id, "email": user.email, "nome": user.nome, "role": user.role
@@ -91,7 +118,7 @@ def google_login(google_data: GoogleLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=401, detail="Invalid Google token")
 
 @router.get("/me")
-def get_profile(current_user: User = Depends(get_current_user)):
+def get_profile(current_user: User = Depends(get_current_user_row)):
     return {"success": True, "data": {
         "id": current_user.id,
         "email": current_user.email,
@@ -103,9 +130,13 @@ def get_profile(current_user: User = Depends(get_current_user)):
     }, "message": "Perfil carregado"}
 
 @router.put("/profile")
-def update_profile(profile_data: UserProfile, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_profile(profile_data: UserProfile, principal: UserPrincipal = Depends(get_current_user), db: Session = Depends(get_db)):
+    current_user = db.get(User, principal.id)
     current_user.nome = profile_data.nome
-    current_user.foto = profile_data.foto
+    try:
+        current_user.foto = photo_reference(profile_data.foto) if profile_data.foto else profile_data.foto
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
     current_user.bio = profile_data.bio
     current_user.tema_cor = profile_data.tema_cor
     db.commit()
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
+from app.services.blob_store import blob_store
+from app.utils import error_response, etag_matches
+
+router = APIRouter(prefix="/blobs", tags=["Blobs"])
+
+# Chave = hash do conteúdo: o mesmo endereço nunca muda de bytes
+BLOB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{key}")
+def get_blob(key: str, request: Request):
+    if not blob_store.valid_key(key) or not blob_store.exists(key):
+        return error_response("Arquivo não encontrado", 404)
+
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": BLOB_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    size = blob_store.size(key)
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(blob_store.open(key), media_type=blob_store.content_type(key), headers=headers)
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
 from pydantic import BaseModel
-from app.database import get_db
+from typing import List, Literal, Optional
+from app.database import get_session
 from app.models.cart import CartItem
-from app.models.product import Product
 from app.models.user import User
 from app.auth import get_current_user
+from app.schemas import CartOut
+from app.services.cart_mutations import CART_BULK_MAX_OPERATIONS, ProductUnavailable, add_item, apply_operations
+from app.services.cart_pricing import CartPricingService
+from app.services.inventory import InsufficientStock
 from app.utils import success_response, error_response
 
 router = APIRouter(prefix="/carrinho", tags=["Carrinho"])
@@ -14,98 +18,105 @@ class CartItemAdd(BaseModel):
     produto_id: int
     quantidade: int = 1
 
+class CartOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    produto_id: int
+    quantidade: Optional[int] = None  # Obrigatória em add/set; ignorada em remove
+
+class CartBulkUpdate(BaseModel):
+    operacoes: List[CartOperation]
+
 @router.get("/")
-def get_carrinho(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    
-    cart_data = []
-    total = 0
-    
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product and product.is_active:
-            preco_atual = product.preco_promocional if product.promocao else product.preco
-            subtotal = preco_atual * item.quantidade
-            total += subtotal
-            
-            cart_data.append({
-                "id": item.id,
-                "produto": {
-                    "id": product.id,
-                    "nome": product.nome,
-                    "preco": product.preco,
-                    "preco_promocional": product.preco_promocional,
-                    "promocao": product.promocao,
-                    "imagens": product.imagens,
-                    "estoque": product.estoque
-                },
-                "quantidade": item.quantidade,
-                "subtotal": subtotal
-            })
-    
-    return success_response(data={"items": cart_data, "total": total}, message="Carrinho carregado")
+async def get_carrinho(current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    cart = await db.run_sync(CartPricingService.price_cart, current_user.id)
+    return success_response(data=CartOut(items=cart.to_response("produto"), total=cart.total), message="Carrinho carregado")
 
 @router.post("/adicionar")
-def adicionar_carrinho(item_data: CartItemAdd, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == item_data.produto_id, Product.is_active == True).first()
-    if not product:
+async def adicionar_carrinho(item_data: CartItemAdd, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    if item_data.quantidade <= 0:
+        return error_response("Quantidade inválida", 400)
+
+    # Um único INSERT ... ON CONFLICT: cliques duplos não criam linhas repetidas
+    try:
+        await db.run_sync(add_item, current_user.id, item_data.produto_id, item_data.quantidade)
+    except ProductUnavailable:
+        await db.rollback()
         return error_response("Produto não encontrado", 404)
-    
-    if product.estoque < item_data.quantidade:
+    except InsufficientStock:
+        await db.rollback()
         return error_response("Estoque insuficiente", 400)
-    
-    existing_item = db.query(CartItem).filter(
-        CartItem.user_id == current_user.id,
-        CartItem.product_id == item_data.produto_id
-    ).first()
-    
-    if existing_item:
-        existing_item.quantidade += item_data.quantidade
-    else:
-        cart_item = CartItem(
-            user_id=current_user.id,
-            product_id=item_data.produto_id,
-            quantidade=item_data.quantidade
-        )
-        db.add(cart_item)
-    
-    db.commit()
+
+    await db.commit()
     return success_response(message="Item adicionado ao carrinho")
 
+@router.patch("/bulk")
+async def atualizar_carrinho_em_lote(data: CartBulkUpdate, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    """Aplica várias operações (add/set/remove) em uma transação; devolve o carrinho"""
+    if not data.operacoes:
+        return error_response("Nenhuma operação enviada", 400)
+    if len(data.operacoes) > CART_BULK_MAX_OPERATIONS:
+        return error_response(f"Máximo de {CART_BULK_MAX_OPERATIONS} operações por lote", 400)
+
+    operations = [
+        {"op": operacao.op, "product_id": operacao.produto_id, "quantidade": operacao.quantidade}
+        for operacao in data.operacoes
+    ]
+    try:
+        await db.run_sync(apply_operations, current_user.id, operations)
+    except ProductUnavailable as e:
+        await db.rollback()
+        return error_response(f"Operação {e.operation_index}: produto {e.product_id} não encontrado", 404)
+    except InsufficientStock as e:
+        await db.rollback()
+        return error_response(f"Operação {e.operation_index}: estoque insuficiente para o produto {e.product_ids[0]}", 400)
+    except ValueError as e:
+        await db.rollback()
+        return error_response(f"Operação {e.operation_index}: quantidade inválida", 400)
+
+    await db.commit()
+    cart = await db.run_sync(CartPricingService.price_cart, current_user.id)
+    return success_response(data=CartOut(items=cart.to_response("produto"), total=cart.total), message="Carrinho atualizado")
+
 @router.put("/item/{item_id}")
-def update_carrinho_item(item_id: int, quantidade: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.user_id == current_user.id
-    ).first()
-    
+async def update_carrinho_item(item_id: int, quantidade: int, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    result = await db.execute(
+        select(CartItem).where(
+            CartItem.id == item_id,
+            CartItem.user_id == current_user.id
+        )
+    )
+    cart_item = result.scalars().first()
+
     if not cart_item:
         return error_response("Item não encontrado", 404)
-    
+
     if quantidade <= 0:
-        db.delete(cart_item)
+        await db.delete(cart_item)
     else:
         cart_item.quantidade = quantidade
-    
-    db.commit()
+
+    await db.commit()
     return success_response(message="Carrinho atualizado")
 
 @router.delete("/item/{item_id}")
-def remover_carrinho_item(item_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.user_id == current_user.id
-    ).first()
-    
+async def remover_carrinho_item(item_id: int, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    result = await db.execute(
+        select(CartItem).where(
+            CartItem.id == item_id,
+            CartItem.user_id == current_user.id
+        )
+    )
+    cart_item = result.scalars().first()
+
     if not cart_item:
         return error_response("Item não encontrado", 404)
-    
-    db.delete(cart_item)
-    db.commit()
+
+    await db.delete(cart_item)
+    await db.commit()
     return success_response(message="Item removido do carrinho")
 
 @router.delete("/limpar")
-def limpar_carrinho(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
-    db.commit()
-    return success_response(message="Carrinho limpo")
\ No newline at end of file
+async def limpar_carrinho(current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    await db.execute(delete(CartItem).where(CartItem.user_id == current_user.id))
+    await db.commit()
+    return success_response(message="Carrinho limpo")
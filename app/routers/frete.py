@@ -3,10 +3,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
 from app.database import get_db
-from app.models.cart import CartItem
-from app.models.product import Product
 from app.models.user import User
 from app.auth import get_current_user
+from app.services.cart_pricing import CartPricingService
 from app.services.viacep import ViaCEPService
 from app.utils import success_response, error_response
 
@@ -22,20 +21,12 @@ def calcular_frete(
     db: Session = Depends(get_db)
 ):
     # Calcular total do carrinho
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
+    cart = CartPricingService.price_cart(db, current_user.id)
     
-    if not cart_items:
+    if cart.is_empty:
         return error_response("Carrinho vazio", 400)
     
-    total = 0
-    
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            preco_atual = product.preco_promocional if product.promocao else product.preco
-            total += preco_atual * item.quantidade
-    
-    shipping_info = ViaCEPService.calculate_shipping(frete_data.cep, total)
+    shipping_info = ViaCEPService.calculate_shipping(frete_data.cep, cart.total)
     
     return success_response(
         data=shipping_info, 
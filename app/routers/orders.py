@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, delete, func
 from pydantic import BaseModel
-from typing import List, Dict, Any
-from app.database import get_db
+from typing import List, Dict, Any, Optional, Tuple
+from app.database import get_session
 from app.models.order import Order
 from app.models.cart import CartItem
-from app.models.product import Product
 from app.models.user import User
 from app.auth import get_current_user
-from app.services.mercadopago import MercadoPagoService
+from app.pagination import apply_keyset, paginate_rows
+from app.schemas import OrderOut, OrderSummaryOut, parse_fields
+from app.services.cart_pricing import CartPricingService
+from app.services.inventory import InsufficientStock, reserve_stock
+from app.models.outbox import PaymentOutbox
+from app.services.payment_outbox import enqueue_payment, payment_dispatcher, payment_status
 from app.services.viacep import ViaCEPService
+from app.utils import ORJSONResponse
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -26,69 +31,108 @@ class OrderCreate(BaseModel):
     endereco: AddressData
     payment_method: str = "pix"
 
+ORDERS_PAGE_SIZE = 20
+ORDERS_MAX_PAGE_SIZE = 100
+
+# Colunas do resumo; fields= escolhe entre elas (items/endereco só no detalhe)
+SUMMARY_COLUMNS = {
+    "id": Order.id,
+    "total": Order.total,
+    "status": Order.status,
+    "created_at": Order.created_at,
+    # Quantidade de linhas contada pelo banco: o JSON dos itens não vem para o Python
+    "item_count": func.coalesce(func.json_array_length(Order.items), 0).label("item_count"),
+}
+
+def summary_statement(user_id: int, status: Optional[List[str]] = None, fields: Optional[Tuple[str, ...]] = None):
+    # id e created_at sempre vêm: são o cursor da próxima página
+    names = dict.fromkeys(("id", "created_at") + tuple(fields or SUMMARY_COLUMNS))
+    query = select(*[SUMMARY_COLUMNS[name] for name in names]).where(Order.user_id == user_id)
+    if status:
+        query = query.where(Order.status.in_(status))
+    return query
+
 @router.get("/")
-def get_orders(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
-    return orders
+async def get_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=ORDERS_MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db=Depends(get_session)
+):
+    """Histórico resumido, mais recentes primeiro; ``status`` aceita vários
+    valores separados por vírgula e a próxima página vem em X-Next-Cursor.
+    ``fields`` escolhe entre as colunas do resumo (id, total, status,
+    created_at, item_count)."""
+    fields = parse_fields(fields, OrderSummaryOut)
+    statuses = [value.strip() for value in status.split(",") if value.strip()] if status else None
+    # Usa o índice (user_id, created_at DESC, id DESC)
+    query = apply_keyset(
+        summary_statement(current_user.id, statuses, fields),
+        cursor, Order.created_at, Order.id, descending=True
+    )
+    result = await db.execute(query.limit(limit + 1))
+    rows, next_cursor = paginate_rows(result.all(), limit)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if fields:
+        page = [{name: getattr(row, name) for name in fields} for row in rows]
+    else:
+        page = [OrderSummaryOut.from_orm(row) for row in rows]
+    return ORJSONResponse(page, headers=headers)
 
 @router.get("/{order_id}")
-def get_order(order_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    order = db.query(Order).filter(Order.id == order_id, Order.user_id == current_user.id).first()
+async def get_order(order_id: int, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    result = await db.execute(
+        select(Order).where(Order.id == order_id, Order.user_id == current_user.id)
+    )
+    order = result.scalars().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return order
+    return ORJSONResponse(OrderOut.from_orm(order))
+
+@router.get("/{order_id}/payment")
+async def get_order_payment(order_id: int, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    result = await db.execute(
+        select(Order, PaymentOutbox)
+        .outerjoin(PaymentOutbox, PaymentOutbox.order_id == Order.id)
+        .where(Order.id == order_id, Order.user_id == current_user.id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order, entry = row
+    return payment_status(entry, order)
 
 @router.post("/calculate-shipping")
-def calculate_shipping(cep: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def calculate_shipping(cep: str, current_user: User = Depends(get_current_user), db=Depends(get_session)):
     # Calcular total do carrinho
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    total = 0
-    
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            preco_atual = product.preco_promocional if product.promocao else product.preco
-            total += preco_atual * item.quantidade
-    
-    shipping_info = ViaCEPService.calculate_shipping(cep, total)
+    cart = await db.run_sync(CartPricingService.price_cart, current_user.id)
+    shipping_info = ViaCEPService.calculate_shipping(cep, cart.total)
     return shipping_info
 
 @router.post("/")
-def create_order(order_data: OrderCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_order(order_data: OrderCreate, current_user: User = Depends(get_current_user), db=Depends(get_session)):
     # Verificar carrinho
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    if not cart_items:
+    cart = await db.run_sync(CartPricingService.price_cart, current_user.id)
+    if cart.is_empty:
         raise HTTPException(status_code=400, detail="Cart is empty")
-    
+
+    if cart.unavailable:
+        raise HTTPException(status_code=400, detail=f"Product {cart.unavailable[0].item.product_id} not available")
+
+    if cart.out_of_stock:
+        raise HTTPException(status_code=400, detail=f"Insufficient stock for {cart.out_of_stock[0].product.nome}")
+
     # Calcular total e preparar items
-    total = 0
-    items = []
-    
-    for cart_item in cart_items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        if not product or not product.is_active:
-            raise HTTPException(status_code=400, detail=f"Product {cart_item.product_id} not available")
-        
-        if product.estoque < cart_item.quantidade:
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for {product.nome}")
-        
-        preco_atual = product.preco_promocional if product.promocao else product.preco
-        subtotal = preco_atual * cart_item.quantidade
-        total += subtotal
-        
-        items.append({
-            "product_id": product.id,
-            "nome": product.nome,
-            "preco": preco_atual,
-            "quantidade": cart_item.quantidade,
-            "subtotal": subtotal
-        })
-    
+    total = cart.total
+    items = cart.order_items()
+
     # Calcular frete
     shipping_info = ViaCEPService.calculate_shipping(order_data.endereco.cep, total)
     frete = shipping_info["frete"]
     total_com_frete = total + frete
-    
+
     # Criar pedido
     order = Order(
         user_id=current_user.id,
@@ -99,28 +143,26 @@ def create_order(order_data: OrderCreate, current_user: User = Depends(get_curre
         payment_method=order_data.payment_method
     )
     db.add(order)
-    db.commit()
-    db.refresh(order)
-    
-    # Criar pagamento no Mercado Pago
-    mp_service = MercadoPagoService()
-    payment_response = mp_service.create_payment({
-        "order_id": order.id,
-        "total": total_com_frete,
-        "email": current_user.email,
-        "nome": current_user.nome,
-        "payment_method": order_data.payment_method
-    })
-    
-    # Atualizar pedido com payment_id
-    order.payment_id = payment_response.get("id")
-    db.commit()
-    
+
+    # Segura o estoque até o webhook do pagamento (ou o vencimento da reserva)
+    try:
+        await db.run_sync(reserve_stock, order)
+    except InsufficientStock as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Pagamento vai para o outbox na mesma transação; o Mercado Pago é
+    # chamado pelo payment_dispatcher fora do request
+    nome = await db.scalar(select(User.nome).where(User.id == current_user.id))
+    entry = enqueue_payment(db, order, current_user.email, nome)
+
     # Limpar carrinho
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
-    db.commit()
-    
-    return {
-        "order": order,
-        "payment": payment_response
-    }
\ No newline at end of file
+    await db.execute(delete(CartItem).where(CartItem.user_id == current_user.id))
+    await db.commit()
+    await db.refresh(order)
+    payment_dispatcher.notify()
+
+    return ORJSONResponse({
+        "order": OrderOut.from_orm(order),
+        "payment": payment_status(entry, order)
+    })
@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
 from pydantic import BaseModel
-from typing import List, Dict, Any
-from app.database import get_db
+from app.database import get_session
 from app.models.order import Order
 from app.models.cart import CartItem
-from app.models.product import Product
 from app.models.user import User
 from app.auth import get_current_user
-from app.services.mercadopago import MercadoPagoService
-from app.services.viacep import ViaCEPService
+from app.services.cart_pricing import CartPricingService
+from app.services.inventory import InsufficientStock, reserve_stock
+from app.models.outbox import PaymentOutbox
+from app.services.payment_outbox import enqueue_payment, payment_dispatcher, payment_status
 from app.utils import success_response, error_response
 
 router = APIRouter(prefix="/pagamento", tags=["Pagamento"])
@@ -29,39 +29,25 @@ class PagamentoData(BaseModel):
     payment_method: str = "pix"
 
 @router.post("/mercadopago")
-def criar_pagamento_mercadopago(
+async def criar_pagamento_mercadopago(
     payment_data: PagamentoData, 
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db=Depends(get_session)
 ):
     # Verificar carrinho
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    if not cart_items:
+    cart = await db.run_sync(CartPricingService.price_cart, current_user.id)
+    if cart.is_empty:
         return error_response("Carrinho vazio", 400)
     
-    # Calcular total e preparar items
-    total = 0
-    items = []
+    if cart.unavailable:
+        return error_response(f"Produto {cart.unavailable[0].item.product_id} não disponível", 400)
+    
+    if cart.out_of_stock:
+        return error_response(f"Estoque insuficiente para {cart.out_of_stock[0].product.nome}", 400)
     
-    for cart_item in cart_items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        if not product or not product.is_active:
-            return error_response(f"Produto {cart_item.product_id} não disponível", 400)
-        
-        if product.estoque < cart_item.quantidade:
-            return error_response(f"Estoque insuficiente para {product.nome}", 400)
-        
-        preco_atual = product.preco_promocional if product.promocao else product.preco
-        subtotal = preco_atual * cart_item.quantidade
-        total += subtotal
-        
-        items.append({
-            "product_id": product.id,
-            "nome": product.nome,
-            "preco": preco_atual,
-            "quantidade": cart_item.quantidade,
-            "subtotal": subtotal
-        })
+    # Calcular total e preparar items
+    total = cart.total
+    items = cart.order_items()
     
     total_com_frete = total + payment_data.frete
     
@@ -75,35 +61,41 @@ def criar_pagamento_mercadopago(
         payment_method=payment_data.payment_method
     )
     db.add(order)
-    db.commit()
-    db.refresh(order)
     
-    # Criar pagamento no Mercado Pago
+    # Segura o estoque até o webhook do pagamento (ou o vencimento da reserva)
     try:
-        mp_service = MercadoPagoService()
-        payment_response = mp_service.create_payment({
-            "order_id": order.id,
-            "total": total_com_frete,
-            "email": current_user.email,
-            "nome": current_user.nome,
-            "payment_method": payment_data.payment_method
-        })
-        
-        # Atualizar pedido com payment_id
-        order.payment_id = payment_response.get("id")
-        db.commit()
-        
-        # Limpar carrinho
-        db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
-        db.commit()
-        
-        return success_response(
-            data={
-                "order_id": order.id,
-                "payment": payment_response
-            },
-            message="Pagamento criado com sucesso"
-        )
+        await db.run_sync(reserve_stock, order)
+    except InsufficientStock as e:
+        await db.rollback()
+        return error_response(f"Estoque insuficiente para os produtos {e.product_ids}", 400)
+    
+    # Pagamento vai para o outbox na mesma transação do pedido
+    nome = await db.scalar(select(User.nome).where(User.id == current_user.id))
+    entry = enqueue_payment(db, order, current_user.email, nome)
     
-    except Exception as e:
-        return error_response(f"Erro ao criar pagamento: {str(e)}", 500)
\ No newline at end of file
+    # Limpar carrinho
+    await db.execute(delete(CartItem).where(CartItem.user_id == current_user.id))
+    await db.commit()
+    await db.refresh(order)
+    payment_dispatcher.notify()
+    
+    return success_response(
+        data={
+            "order_id": order.id,
+            "payment": payment_status(entry, order)
+        },
+        message="Pedido criado, pagamento em processamento"
+    )
+
+@router.get("/status/{order_id}")
+async def status_pagamento(order_id: int, current_user: User = Depends(get_current_user), db=Depends(get_session)):
+    result = await db.execute(
+        select(Order, PaymentOutbox)
+        .outerjoin(PaymentOutbox, PaymentOutbox.order_id == Order.id)
+        .where(Order.id == order_id, Order.user_id == current_user.id)
+    )
+    row = result.first()
+    if not row:
+        return error_response("Pedido não encontrado", 404)
+    order, entry = row
+    return success_response(data=payment_status(entry, order), message="Status do pagamento")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from pydantic import BaseModel
@@ -6,6 +6,10 @@ from typing import List, Optional
 from app.database import get_db
 from app.models.product import Product
 from app.auth import require_admin
+from app.schemas import ProductOut
+from app.services.catalog_cache import catalog_cache
+from app.services.product_images import generate_product_variants
+from app.utils import ORJSONResponse
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
@@ -53,7 +57,7 @@ def get_products(
         query = query.filter(Product.promocao == promocao)
     
     products = query.offset(skip).limit(limit).all()
-    return products
+    return ORJSONResponse([ProductOut.from_orm(p) for p in products])
 
 @router.get("/categories")
 def get_categories():
@@ -67,23 +71,30 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
     return product
 
 @router.post("/", dependencies=[Depends(require_admin)])
-def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
+def create_product(product_data: ProductCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     product = Product(**product_data.dict())
     db.add(product)
     db.commit()
     db.refresh(product)
+    catalog_cache.invalidate(product.id)
+    if product.imagens:
+        background_tasks.add_task(generate_product_variants, product.id)
     return product
 
 @router.put("/{product_id}", dependencies=[Depends(require_admin)])
-def update_product(product_id: int, product_data: ProductUpdate, db: Session = Depends(get_db)):
+def update_product(product_id: int, product_data: ProductUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    for field, value in product_data.dict(exclude_unset=True).items():
+    changes = product_data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(product, field, value)
     
     db.commit()
+    catalog_cache.invalidate(product_id)
+    if "imagens" in changes:
+        background_tasks.add_task(generate_product_variants, product_id)
     return product
 
 @router.delete("/{product_id}", dependencies=[Depends(require_admin)])
@@ -94,4 +105,5 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     
     product.is_active = False
     db.commit()
+    catalog_cache.invalidate(product_id)
     return {"message": "Product deleted successfully"}
\ No newline at end of file
@@ -1,17 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from pydantic import BaseModel
+import hashlib
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_session, engine
 from app.models.product import Product
 from app.auth import require_admin
-from app.utils import success_response, error_response
+from app.pagination import apply_keyset, paginate_rows
+from app.schemas import ProductOut, load_only_fields, parse_fields
+from app.services.catalog_cache import catalog_cache, MISSING
+from app.services.product_import import IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS, import_format, iter_records, upsert_products
+from app.services.product_images import generate_product_variants, variants_for, view_images
+from app.services.search import ProductSearch
+from app.utils import ORJSONResponse, cache_headers, error_response, not_modified, success_response
 
 router = APIRouter(prefix="/produtos", tags=["Produtos"])
 products_router = APIRouter(prefix="/products", tags=["Products"])
 
+# Leituras públicas do catálogo: o CDN pode servir e revalidar com o ETag
+CATALOG_CACHE_CONTROL = os.getenv(
+    "CATALOG_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300"
+)
+CATEGORIAS = ["Feminina", "Masculina", "Cosméticos", "Bijuterias"]
+# Lista fixa no código: o ETag só muda com o deploy
+CATEGORIAS_ETAG = 'W/"categorias-%s"' % hashlib.sha1(",".join(CATEGORIAS).encode()).hexdigest()[:12]
+
 class ProductCreate(BaseModel):
+    sku: Optional[str] = None
     nome: str
     descricao: Optional[str] = None
     preco: float
@@ -22,6 +39,7 @@ class ProductCreate(BaseModel):
     estoque: int = 0
 
 class ProductUpdate(BaseModel):
+    sku: Optional[str] = None
     nome: Optional[str] = None
     descricao: Optional[str] = None
     preco: Optional[float] = None
@@ -31,99 +49,263 @@ class ProductUpdate(BaseModel):
     preco_promocional: Optional[float] = None
     estoque: Optional[int] = None
 
+# Carousel só mostra cards: não precisa de descricao/timestamps
+CARD_FIELDS = ("id", "nome", "preco", "preco_promocional", "promocao", "categoria", "estoque", "imagens", "imagens_webp")
+# Campos calculados e as colunas que eles leem
+PRODUCT_FIELD_DEPENDS = {"imagens_webp": ("imagens",), "variantes": ("imagens",)}
+
+async def list_products(db, categoria=None, search=None, promocao=None, skip=0, limit=50, cursor=None, fields=None, version=None):
+    """Devolve ``(produtos, next_cursor)``; buscas ordenam por relevância e não têm cursor.
+
+    Com ``fields`` só as colunas pedidas saem do banco (``load_only``) e cada
+    produto vira um dict com exatamente esses campos. ``version`` é a versão
+    do catálogo já lida pelo handler (para o ETag); sem ela, é lida aqui.
+    """
+    if version is None:
+        version = await catalog_cache.current_version(db)
+    key = catalog_cache.listing_key(version, categoria, search, promocao, skip, limit, cursor, fields)
+    cached = catalog_cache.get_listing(key)
+    if cached is not MISSING:
+        return cached
+
+    query = select(Product).where(Product.is_active == True)
+    if fields:
+        # created_at entra sempre: é a chave do cursor
+        query = query.options(load_only_fields(
+            Product, fields, always=("id", "created_at"), depends=PRODUCT_FIELD_DEPENDS
+        ))
+    
+    if categoria:
+        query = query.where(Product.categoria == categoria)
+    
+    if promocao is not None:
+        query = query.where(Product.promocao == promocao)
+    
+    if search:
+        query = ProductSearch.apply(query, search, engine.dialect.name)
+    else:
+        query = apply_keyset(query, cursor, Product.created_at, Product.id)
+    
+    result = await db.execute(query.offset(skip).limit(limit + 1))
+    products, next_cursor = paginate_rows(result.scalars().all(), limit)
+    if search:
+        next_cursor = None
+
+    # Listagens mandam o tamanho "card", não a imagem cheia
+    wants_images = not fields or "imagens" in fields or "imagens_webp" in fields
+    variants = await variants_for(db, [p.id for p in products]) if wants_images else {}
+    page = []
+    for p in products:
+        values = {}
+        if wants_images:
+            values["imagens"], values["imagens_webp"] = view_images(p.imagens, variants.get(p.id, {}), "card")
+        if not fields:
+            page.append(ProductOut.from_orm(p, **values))
+            continue
+        page.append({
+            name: values[name] if name in values else getattr(p, name, None)
+            for name in fields
+        })
+    return catalog_cache.set_listing(key, (page, next_cursor))
+
 @router.get("/")
-def get_produtos(
+async def get_produtos(
+    request: Request,
     categoria: Optional[str] = None,
     search: Optional[str] = None,
     promocao: Optional[bool] = None,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db=Depends(get_session)
 ):
-    query = db.query(Product).filter(Product.is_active == True)
-    
-    if categoria:
-        query = query.filter(Product.categoria == categoria)
-    
-    if search:
-        query = query.filter(or_(
-            Product.nome.ilike(f"%{search}%"),
-            Product.descricao.ilike(f"%{search}%")
-        ))
-    
-    if promocao is not None:
-        query = query.filter(Product.promocao == promocao)
-    
-    products = query.offset(skip).limit(limit).all()
-    return success_response(data=products, message="Produtos listados com sucesso")
+    # Campos inválidos são 400 mesmo para quem manda If-None-Match
+    fields = parse_fields(fields, ProductOut)
+    version = await catalog_cache.current_version(db)
+    etag = catalog_cache.etag(version)
+    cached = not_modified(request, etag, CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
+
+    products, next_cursor = await list_products(db, categoria, search, promocao, skip, limit, cursor, fields, version)
+    response = success_response(data=products, message="Produtos listados com sucesso", next_cursor=next_cursor)
+    return cache_headers(response, etag, CATALOG_CACHE_CONTROL)
 
 @router.get("/{product_id}")
-def get_produto(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id, Product.is_active == True).first()
-    if not product:
-        return error_response("Produto não encontrado", 404)
-    return success_response(data=product, message="Produto encontrado")
+async def get_produto(product_id: int, request: Request, db=Depends(get_session)):
+    version = await catalog_cache.current_version(db)
+    etag = catalog_cache.etag(version)
+    cached = not_modified(request, etag, CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
+
+    product = catalog_cache.get_product(version, product_id)
+    if product is MISSING:
+        result = await db.execute(
+            select(Product).where(Product.id == product_id, Product.is_active == True)
+        )
+        product = result.scalars().first()
+        if not product:
+            return error_response("Produto não encontrado", 404)
+        variants = (await variants_for(db, [product.id])).get(product.id, {})
+        _, webps = view_images(product.imagens, variants, "zoom")
+        product = catalog_cache.set_product(version, product_id, ProductOut.from_orm(
+            product,
+            imagens_webp=webps,
+            variantes=[variants.get(position) for position in range(len(product.imagens or []))]
+        ))
+    response = success_response(data=product, message="Produto encontrado")
+    return cache_headers(response, etag, CATALOG_CACHE_CONTROL)
 
 @router.post("/", dependencies=[Depends(require_admin)])
-def create_produto(product_data: ProductCreate, db: Session = Depends(get_db)):
+async def create_produto(product_data: ProductCreate, background_tasks: BackgroundTasks, db=Depends(get_session)):
     product = Product(**product_data.dict())
     db.add(product)
-    db.commit()
-    db.refresh(product)
-    return success_response(data=product, message="Produto criado com sucesso")
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return error_response("SKU já cadastrado", 409)
+    await db.refresh(product)
+    catalog_cache.invalidate(product.id)
+    if product.imagens:
+        background_tasks.add_task(generate_product_variants, product.id)
+    return success_response(data=ProductOut.from_orm(product), message="Produto criado com sucesso")
+
+@router.post("/import", dependencies=[Depends(require_admin)])
+async def import_produtos(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    formato: Optional[str] = None,
+    db=Depends(get_session)
+):
+    """Importação em lote por SKU: corpo CSV (com cabeçalho) ou NDJSON.
+
+    O corpo é lido em streaming e gravado em lotes; linhas inválidas entram
+    em ``erros`` sem interromper a importação. O cache do catálogo é
+    invalidado uma vez no fim.
+    """
+    formato = import_format(request.headers.get("content-type"), formato)
+    if formato is None:
+        return error_response("Envie text/csv ou application/x-ndjson (ou ?formato=csv|ndjson)", 415)
+
+    report = {"criados": 0, "atualizados": 0, "erros": [], "total_erros": 0}
+
+    def reject(linha, sku, erro):
+        report["total_erros"] += 1
+        if len(report["erros"]) < IMPORT_MAX_ERRORS:
+            report["erros"].append({"linha": linha, "sku": sku, "erro": erro})
+
+    async def flush(batch):
+        result = await db.run_sync(upsert_products, [row for _, row in batch.values()])
+        report["criados"] += result["created"]
+        report["atualizados"] += result["updated"]
+        for sku, erro in result["failed"]:
+            reject(batch[sku][0], sku, erro)
+        for product_id in result["image_ids"]:
+            background_tasks.add_task(generate_product_variants, product_id)
+
+    # SKU repetido no mesmo lote: vale a última linha
+    batch = {}
+    async for linha, record in iter_records(request.stream(), formato):
+        if isinstance(record, str):
+            reject(linha, None, record)
+            continue
+        try:
+            product = ProductCreate.parse_obj(record)
+        except ValidationError as e:
+            reject(linha, record.get("sku"), "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            continue
+        if not product.sku:
+            reject(linha, None, "sku: campo obrigatório na importação")
+            continue
+        batch[product.sku] = (linha, product.dict())
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush(batch)
+            batch = {}
+    if batch:
+        await flush(batch)
+
+    if report["criados"] or report["atualizados"]:
+        catalog_cache.invalidate()
+    return success_response(data=report, message="Importação concluída")
 
 @router.put("/{product_id}", dependencies=[Depends(require_admin)])
-def update_produto(product_id: int, product_data: ProductUpdate, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def update_produto(product_id: int, product_data: ProductUpdate, background_tasks: BackgroundTasks, db=Depends(get_session)):
+    product = await db.get(Product, product_id)
     if not product:
         return error_response("Produto não encontrado", 404)
     
-    for field, value in product_data.dict(exclude_unset=True).items():
+    changes = product_data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(product, field, value)
     
-    db.commit()
-    return success_response(data=product, message="Produto atualizado com sucesso")
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return error_response("SKU já cadastrado", 409)
+    await db.refresh(product)
+    catalog_cache.invalidate(product_id)
+    # Só imagens novas/alteradas são processadas (hash da origem)
+    if "imagens" in changes:
+        background_tasks.add_task(generate_product_variants, product_id)
+    return success_response(data=ProductOut.from_orm(product), message="Produto atualizado com sucesso")
 
 @products_router.get("/")
-def get_products(
+async def get_products(
+    request: Request,
     categoria: Optional[str] = None,
     search: Optional[str] = None,
     promocao: Optional[bool] = None,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db=Depends(get_session)
 ):
-    query = db.query(Product).filter(Product.is_active == True)
-    
-    if categoria:
-        query = query.filter(Product.categoria == categoria)
-    
-    if search:
-        query = query.filter(or_(
-            Product.nome.ilike(f"%{search}%"),
-            Product.descricao.ilike(f"%{search}%")
-        ))
-    
-    if promocao is not None:
-        query = query.filter(Product.promocao == promocao)
-    
-    products = query.offset(skip).limit(limit).all()
-    return success_response(data=products, message="Produtos listados com sucesso")
+    # Campos inválidos são 400 mesmo para quem manda If-None-Match
+    fields = parse_fields(fields, ProductOut)
+    version = await catalog_cache.current_version(db)
+    etag = catalog_cache.etag(version)
+    cached = not_modified(request, etag, CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
+
+    products, next_cursor = await list_products(db, categoria, search, promocao, skip, limit, cursor, fields, version)
+    response = success_response(data=products, message="Produtos listados com sucesso", next_cursor=next_cursor)
+    return cache_headers(response, etag, CATALOG_CACHE_CONTROL)
 
 @products_router.get("/carousel")
-def get_carousel_products(db: Session = Depends(get_db)):
-    products = db.query(Product).filter(
-        Product.is_active == True,
-        Product.promocao == True
-    ).limit(10).all()
-    return success_response(data=products, message="Produtos do carousel")
+async def get_carousel_products(request: Request, db=Depends(get_session)):
+    version = await catalog_cache.current_version(db)
+    etag = catalog_cache.etag(version)
+    cached = not_modified(request, etag, CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
+
+    # Ativos em promoção, 10 primeiros, só os campos do card
+    products, _ = await list_products(db, promocao=True, skip=0, limit=10, fields=CARD_FIELDS, version=version)
+    response = success_response(data=products, message="Produtos do carousel")
+    return cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+
+@products_router.get("/categories")
+def get_categories(request: Request):
+    cached = not_modified(request, CATEGORIAS_ETAG, CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
+    return cache_headers(ORJSONResponse(CATEGORIAS), CATEGORIAS_ETAG, CATALOG_CACHE_CONTROL)
 
 @router.delete("/{product_id}", dependencies=[Depends(require_admin)])
-def delete_produto(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def delete_produto(product_id: int, db=Depends(get_session)):
+    product = await db.get(Product, product_id)
     if not product:
         return error_response("Produto não encontrado", 404)
     
     product.is_active = False
-    db.commit()
+    await db.commit()
+    catalog_cache.invalidate(product_id)
     return success_response(message="Produto deletado com sucesso")
\ No newline at end of file
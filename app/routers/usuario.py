@@ -3,10 +3,11 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.user import User
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_user_row
+from app.services.user_cache import UserPrincipal
 from app.utils import success_response, error_response
-import base64
-import io
+from starlette.concurrency import run_in_threadpool
+from app.services.user_photos import InvalidImage, photo_reference, store_user_photo
 
 router = APIRouter(prefix="/usuario", tags=["Usuario"])
 
@@ -17,7 +18,7 @@ class UserProfile(BaseModel):
     foto: str = None
 
 @router.get("/perfil")
-def get_perfil(current_user: User = Depends(get_current_user)):
+def get_perfil(current_user: User = Depends(get_current_user_row)):
     return success_response(data={
         "id": current_user.id,
         "email": current_user.email,
@@ -29,7 +30,8 @@ def get_perfil(current_user: User = Depends(get_current_user)):
     }, message="Perfil carregado")
 
 @router.put("/perfil")
-def update_perfil(profile_data: UserProfile, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_perfil(profile_data: UserProfile, principal: UserPrincipal = Depends(get_current_user), db: Session = Depends(get_db)):
+    current_user = db.get(User, principal.id)
     if profile_data.nome:
         current_user.nome = profile_data.nome
     if profile_data.bio:
@@ -37,7 +39,10 @@ def update_perfil(profile_data: UserProfile, current_user: User = Depends(get_cu
     if profile_data.tema_cor:
         current_user.tema_cor = profile_data.tema_cor
     if profile_data.foto:
-        current_user.foto = profile_data.foto
+        try:
+            current_user.foto = photo_reference(profile_data.foto)
+        except InvalidImage as e:
+            return error_response(str(e), 400)
     
     db.commit()
     return success_response(message="Perfil atualizado com sucesso")
@@ -45,7 +50,7 @@ def update_perfil(profile_data: UserProfile, current_user: User = Depends(get_cu
 @router.post("/upload-foto")
 async def upload_foto(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    principal: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if not file.content_type.startswith("image/"):
@@ -54,14 +59,18 @@ async def upload_foto(
     try:
         contents = await file.read()
         
-        # Converter para base64 sem processamento
-        image_base64 = f"data:image/jpeg;base64,{base64.b64encode(contents).decode()}"
-        
-        # Salvar no perfil
-        current_user.foto = image_base64
-        db.commit()
-        
-        return success_response(data={"foto": image_base64}, message="Foto atualizada com sucesso")
+        # Original + variantes no blob store; no usuário fica só a URL curta.
+        # A Session é síncrona: a gravação vai junto para o threadpool
+        def save_photo():
+            photo = store_user_photo(contents)
+            current_user = db.get(User, principal.id)
+            current_user.foto = photo["foto"]
+            db.commit()
+            return photo
+
+        photo = await run_in_threadpool(save_photo)
+
+        return success_response(data=photo, message="Foto atualizada com sucesso")
     
     except Exception as e:
-        return error_response(f"Erro ao processar imagem: {str(e)}", 400)
\ No newline at end of file
+        return error_response(f"Erro ao processar imagem: {str(e)}", 400)
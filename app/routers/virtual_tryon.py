@@ -1,14 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
-from PIL import Image
-import io
 import base64
+import os
 from app.database import get_db
 from app.models.user import User
 from app.auth import get_current_user
+from app.services.image_pipeline import ImagePipelineBusy, image_pipeline
 
 router = APIRouter(prefix="/virtual-tryon", tags=["Virtual Try-On"])
 
+TRYON_MAX_UPLOAD_BYTES = int(os.getenv("TRYON_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+async def read_limited(file: UploadFile, limit: int) -> bytes:
+    """Lê o upload em blocos e para assim que passa do limite"""
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Image larger than {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 @router.post("/upload")
 async def upload_user_image(
     file: UploadFile = File(...),
@@ -19,28 +36,21 @@ async def upload_user_image(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    try:
-        # Ler e processar a imagem
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        
-        # Redimensionar se necessário (máximo 1024x1024)
-        if image.width > 1024 or image.height > 1024:
-            image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-        
-        # Converter para base64
-        buffer = io.BytesIO()
-        image.save(buffer, format="JPEG", quality=85)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        
-        return {
-            "message": "Image uploaded successfully",
-            "image_id": f"user_{current_user.id}_{file.filename}",
-            "image_data": image_base64
-        }
+    contents = await read_limited(file, TRYON_MAX_UPLOAD_BYTES)
     
+    try:
+        # Decode/resize/encode (máximo 1024x1024) no pool de processos, fora do event loop
+        jpeg = await image_pipeline.resize_to_jpeg(contents, 1024, 85)
+    except ImagePipelineBusy:
+        raise HTTPException(status_code=503, detail="Image processing busy, try again", headers={"Retry-After": "2"})
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
+    
+    return {
+        "message": "Image uploaded successfully",
+        "image_id": f"user_{current_user.id}_{file.filename}",
+        "image_data": base64.b64encode(jpeg).decode()
+    }
 
 @router.post("/process")
 async def process_virtual_tryon(
@@ -0,0 +1,115 @@
+from dataclasses import MISSING, dataclass, fields
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy.orm import load_only
+
+# Schemas de saída. São dataclasses congeladas: o orjson serializa direto
+# (sem o passeio do jsonable_encoder) e dá para guardar no cache sem cópia.
+
+@lru_cache(maxsize=None)
+def _orm_fields(cls) -> Tuple[str, ...]:
+    # Campos com default são calculados (não existem no modelo ORM)
+    return tuple(field.name for field in fields(cls) if field.default is MISSING)
+
+@lru_cache(maxsize=None)
+def schema_fields(cls) -> Tuple[str, ...]:
+    return tuple(field.name for field in fields(cls))
+
+def parse_fields(value: Optional[str], schema) -> Optional[Tuple[str, ...]]:
+    """``fields=id,nome,preco`` -> ("id", "nome", "preco"); None = tudo"""
+    if not value:
+        return None
+    requested = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in schema_fields(schema)]
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def load_only_fields(model, requested: Iterable[str], always: Iterable[str] = ("id",),
+                     depends: Optional[Dict[str, Iterable[str]]] = None):
+    """``load_only`` com as colunas pedidas; campos calculados puxam as
+    colunas de que dependem (``depends``)."""
+    columns = set(model.__table__.columns.keys())
+    load = set(always)
+    for name in requested:
+        if name in columns:
+            load.add(name)
+        load.update((depends or {}).get(name, ()))
+    return load_only(*[getattr(model, name) for name in sorted(load)])
+
+class OrmSchema:
+    @classmethod
+    def from_orm(cls, obj, **values):
+        """Lê os campos do objeto ORM; ``values`` cobre os campos calculados"""
+        for name in _orm_fields(cls):
+            if name not in values:
+                values[name] = getattr(obj, name)
+        return cls(**values)
+
+@dataclass(frozen=True)
+class ProductOut(OrmSchema):
+    id: int
+    nome: str
+    descricao: Optional[str]
+    preco: float
+    imagens: List[str]
+    categoria: str
+    promocao: bool
+    preco_promocional: Optional[float]
+    estoque: int
+    sku: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    # Listagens: imagens/imagens_webp no tamanho "card". Detalhe: imagens são
+    # as originais (o que o admin edita) e variantes traz todos os tamanhos.
+    # imagens_webp é None nas posições que ainda não têm variante.
+    imagens_webp: Optional[List[Optional[str]]] = None
+    variantes: Optional[List[Optional[Dict[str, Dict[str, str]]]]] = None
+
+@dataclass(frozen=True)
+class CartProductOut(OrmSchema):
+    id: int
+    nome: str
+    preco: float
+    preco_promocional: Optional[float]
+    promocao: bool
+    imagens: List[str]
+    estoque: int
+
+@dataclass(frozen=True)
+class CartItemOut:
+    id: int
+    produto: CartProductOut
+    quantidade: int
+    subtotal: float
+
+@dataclass(frozen=True)
+class CartOut:
+    items: List[CartItemOut]
+    total: float
+
+@dataclass(frozen=True)
+class OrderOut(OrmSchema):
+    id: int
+    user_id: int
+    total: float
+    frete: float
+    status: str
+    payment_id: Optional[str]
+    payment_method: Optional[str]
+    endereco: Dict[str, Any]
+    items: List[Dict[str, Any]]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+@dataclass(frozen=True)
+class OrderSummaryOut(OrmSchema):
+    # Histórico de pedidos: sem items/endereco (detalhe só em GET /orders/{id})
+    id: int
+    total: float
+    status: str
+    created_at: Optional[datetime]
+    item_count: int
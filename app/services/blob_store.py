@@ -0,0 +1,102 @@
+import hashlib
+import os
+from abc import ABC, abstractmethod
+import re
+import tempfile
+from typing import Iterator, Optional
+
+# <sha256>[.<variante>].<extensão>, ex.: 9f86...08.jpg, 9f86...08.thumb.jpg
+BLOB_KEY = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9_]+)?\.(jpg|png|webp|gif)$")
+BLOB_URL_PREFIX = os.getenv("BLOB_URL_PREFIX", "/api/blobs")
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+
+def blob_url(key: str) -> str:
+    return f"{BLOB_URL_PREFIX}/{key}"
+
+class BlobStore(ABC):
+    """Armazenamento endereçado por conteúdo (SHA-256).
+
+    A mesma imagem enviada duas vezes ocupa um único blob; como a chave muda
+    quando o conteúdo muda, quem serve pode mandar cache "immutable".
+    """
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def valid_key(key: str) -> bool:
+        return bool(BLOB_KEY.match(key))
+
+    @staticmethod
+    def content_type(key: str) -> str:
+        return CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> str:
+        """Grava o blob (no-op se a chave já existe); devolve a chave"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Tamanho em bytes; None se o blob não existe"""
+
+    @abstractmethod
+    def open(self, key: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Conteúdo em pedaços de ``chunk_size`` (para StreamingResponse)"""
+
+class LocalBlobStore(BlobStore):
+    """Backend em disco: ``root/ab/cd/<chave>``.
+
+    No Render o disco do serviço é efêmero; aponte BLOB_STORE_PATH para um
+    persistent disk.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        if not self.valid_key(key):
+            raise ValueError(f"Invalid blob key: {key}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Escreve em arquivo temporário e renomeia: leitores nunca veem blob pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            return None
+
+    def open(self, key: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as blob:
+            while True:
+                chunk = blob.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+blob_store = LocalBlobStore(os.getenv("BLOB_STORE_PATH", "storage/blobs"))
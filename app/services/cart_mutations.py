@@ -0,0 +1,122 @@
+from typing import Any, Dict, Iterable
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.cart import CartItem
+from app.models.product import Product
+from app.services.inventory import InsufficientStock
+
+CART_BULK_MAX_OPERATIONS = 100
+
+class ProductUnavailable(Exception):
+    def __init__(self, product_id: int):
+        self.product_id = product_id
+        super().__init__(f"Product {product_id} not available")
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def _upsert(db, user_id: int, product_id: int, quantidade: int, accumulate: bool) -> int:
+    """INSERT ... SELECT ... ON CONFLICT (user_id, product_id) DO UPDATE em um round trip.
+
+    O SELECT só devolve linha se o produto estiver ativo e com estoque para
+    ``quantidade``; ao somar numa linha existente o WHERE do DO UPDATE
+    confere o total. Devolve o rowcount (0 = nada gravado).
+    """
+    insert = _INSERTS[db.get_bind().dialect.name]
+    source = select(literal(user_id), Product.id, literal(quantidade)).where(
+        Product.id == product_id, Product.is_active == True, Product.estoque >= quantidade
+    )
+    statement = insert(CartItem).from_select(["user_id", "product_id", "quantidade"], source)
+    if accumulate:
+        total = CartItem.quantidade + statement.excluded.quantidade
+        stock = select(Product.estoque).where(Product.id == product_id).scalar_subquery()
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "product_id"], set_={"quantidade": total}, where=stock >= total
+        )
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "product_id"], set_={"quantidade": statement.excluded.quantidade}
+        )
+    return db.execute(statement).rowcount
+
+def _write_fallback(db, user_id: int, product_id: int, quantidade: int, accumulate: bool) -> int:
+    # Dialetos sem ON CONFLICT: lê e grava (sujeito a corrida, como antes)
+    estoque = db.execute(
+        select(Product.estoque).where(Product.id == product_id, Product.is_active == True)
+    ).scalar()
+    item = db.execute(
+        select(CartItem).where(CartItem.user_id == user_id, CartItem.product_id == product_id)
+    ).scalars().first()
+    total = quantidade + (item.quantidade if item and accumulate else 0)
+    if estoque is None or estoque < total:
+        return 0
+    if item:
+        item.quantidade = total
+    else:
+        db.add(CartItem(user_id=user_id, product_id=product_id, quantidade=total))
+    db.flush()
+    return 1
+
+def _write(db, user_id: int, product_id: int, quantidade: int, accumulate: bool) -> None:
+    if db.get_bind().dialect.name in _INSERTS:
+        written = _upsert(db, user_id, product_id, quantidade, accumulate)
+    else:
+        written = _write_fallback(db, user_id, product_id, quantidade, accumulate)
+    if written:
+        return
+
+    # Só no caminho de erro: descobre se faltou o produto ou o estoque
+    found = db.execute(
+        select(Product.id).where(Product.id == product_id, Product.is_active == True)
+    ).scalar()
+    if found is None:
+        raise ProductUnavailable(product_id)
+    raise InsufficientStock([product_id])
+
+def add_item(db, user_id: int, product_id: int, quantidade: int = 1) -> None:
+    """Soma ``quantidade`` à linha do produto (cria se não existir).
+
+    ``db`` é a Session síncrona; nos routers async use ``db.run_sync``.
+    O commit fica com o chamador.
+    """
+    if quantidade <= 0:
+        raise ValueError("quantidade must be positive")
+    _write(db, user_id, product_id, quantidade, accumulate=True)
+
+def set_item(db, user_id: int, product_id: int, quantidade: int) -> None:
+    """Define a quantidade da linha; zero ou menos remove o item"""
+    if quantidade <= 0:
+        remove_item(db, user_id, product_id)
+        return
+    _write(db, user_id, product_id, quantidade, accumulate=False)
+
+def remove_item(db, user_id: int, product_id: int) -> None:
+    db.execute(
+        delete(CartItem)
+        .where(CartItem.user_id == user_id, CartItem.product_id == product_id)
+        .execution_options(synchronize_session=False)
+    )
+
+def apply_operations(db, user_id: int, operations: Iterable[Dict[str, Any]]) -> None:
+    """Aplica as operações em ordem, na transação do chamador.
+
+    Cada operação é ``{"op": "add" | "set" | "remove", "product_id": ..., "quantidade": ...}``;
+    ``quantidade`` é obrigatória em add/set (sem ela é ValueError, não 1).
+    A primeira falha levanta a exceção com ``operation_index`` preenchido;
+    o chamador faz rollback e nada do lote fica gravado.
+    """
+    for index, operation in enumerate(operations):
+        try:
+            quantidade = operation.get("quantidade")
+            if operation["op"] in ("add", "set") and quantidade is None:
+                raise ValueError(f"quantidade is required for {operation['op']!r}")
+            if operation["op"] == "add":
+                add_item(db, user_id, operation["product_id"], quantidade)
+            elif operation["op"] == "set":
+                set_item(db, user_id, operation["product_id"], quantidade)
+            elif operation["op"] == "remove":
+                remove_item(db, user_id, operation["product_id"])
+            else:
+                raise ValueError(f"Unknown cart operation {operation['op']!r}")
+        except (ProductUnavailable, InsufficientStock, ValueError) as e:
+            e.operation_index = index
+            raise
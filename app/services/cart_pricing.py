@@ -0,0 +1,118 @@
+from dataclasses import asdict
+from sqlalchemy import event, select
+from sqlalchemy.orm import undefer
+from typing import Any, Dict, List, Optional
+from app.models.cart import CartItem
+from app.models.product import Product
+from app.schemas import CartItemOut, CartProductOut
+
+class CartLine:
+    def __init__(self, item: CartItem, product: Optional[Product]):
+        self.item = item
+        self.product = product
+
+    @property
+    def available(self) -> bool:
+        return self.product is not None and bool(self.product.is_active)
+
+    @property
+    def preco_atual(self) -> float:
+        if self.product.promocao and self.product.preco_promocional is not None:
+            return self.product.preco_promocional
+        return self.product.preco
+
+    @property
+    def subtotal(self) -> float:
+        return self.preco_atual * self.item.quantidade
+
+    @property
+    def in_stock(self) -> bool:
+        # disponivel já desconta as reservas de checkouts em andamento
+        return self.product.disponivel >= self.item.quantidade
+
+class CartPricing:
+    def __init__(self, lines: List[CartLine], query_count: int):
+        self.lines = lines
+        self.query_count = query_count
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.lines
+
+    @property
+    def items(self) -> List[CartLine]:
+        return [line for line in self.lines if line.available]
+
+    @property
+    def unavailable(self) -> List[CartLine]:
+        return [line for line in self.lines if not line.available]
+
+    @property
+    def out_of_stock(self) -> List[CartLine]:
+        return [line for line in self.items if not line.in_stock]
+
+    @property
+    def total(self) -> float:
+        return sum(line.subtotal for line in self.items)
+
+    def to_response(self, product_key: str = "produto") -> List[Any]:
+        """Itens no formato retornado por GET /carrinho e GET /cart"""
+        items = [CartItemOut(
+            id=line.item.id,
+            produto=CartProductOut.from_orm(line.product),
+            quantidade=line.item.quantidade,
+            subtotal=line.subtotal
+        ) for line in self.items]
+        if product_key == "produto":
+            return items
+        # /cart (legado) usa "product" como chave
+        return [{
+            "id": item.id,
+            product_key: asdict(item.produto),
+            "quantidade": item.quantidade,
+            "subtotal": item.subtotal
+        } for item in items]
+
+    def order_items(self) -> List[Dict[str, Any]]:
+        """Itens no formato gravado em Order.items"""
+        return [{
+            "product_id": line.product.id,
+            "nome": line.product.nome,
+            "preco": line.preco_atual,
+            "quantidade": line.item.quantidade,
+            "subtotal": line.subtotal
+        } for line in self.items]
+
+class CartPricingService:
+    """Carrega o carrinho do usuário (itens + produtos) em uma única query.
+
+    ``price_cart`` recebe uma Session síncrona; nos routers async use
+    ``await db.run_sync(CartPricingService.price_cart, user_id)``.
+    """
+
+    @staticmethod
+    def statement(user_id: int):
+        return (
+            select(CartItem, Product)
+            .outerjoin(Product, Product.id == CartItem.product_id)
+            .where(CartItem.user_id == user_id)
+            .order_by(CartItem.id)
+            .options(undefer(Product.disponivel))
+        )
+
+    @staticmethod
+    def price_cart(db, user_id: int) -> CartPricing:
+        connection = db.connection()
+        executed = []
+
+        def count_query(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement)
+
+        event.listen(connection, "before_cursor_execute", count_query)
+        try:
+            rows = db.execute(CartPricingService.statement(user_id)).all()
+        finally:
+            event.remove(connection, "before_cursor_execute", count_query)
+
+        lines = [CartLine(item, product) for item, product in rows]
+        return CartPricing(lines, query_count=len(executed))
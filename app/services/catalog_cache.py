@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from app.models.catalog_version import CatalogVersion
+from app.services.cache import TTLCache, MISSING
+
+class CatalogCache:
+    """Cache do catálogo público de produtos.
+
+    Listagens são indexadas pela tupla de filtros e produtos pelo id, sempre
+    junto com a versão do catálogo. A versão é o contador ``catalog_version``
+    do banco (triggers o sobem a cada escrita no catálogo), guardado aqui por
+    ``version_ttl`` segundos: dentro dessa janela o 304 sai sem ir ao banco.
+    Uma escrita em outro worker aparece em até ``version_ttl``; aí a versão,
+    o ETag e as chaves mudam e o que está em memória deixa de ser servido.
+    ``invalidate`` libera a memória e faz o próximo request deste processo
+    reler a versão.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, version_ttl: float = 1.0):
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self.listings = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.products = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.version: Optional[int] = None
+        self._version_read_at = 0.0
+        self._lock = threading.Lock()
+
+    async def current_version(self, db) -> int:
+        """Versão do catálogo (db async ou adapter); descarta entradas antigas.
+
+        Só consulta o banco quando a versão guardada passou de ``version_ttl``.
+        """
+        if self.version is not None and time.monotonic() - self._version_read_at < self.version_ttl:
+            return self.version
+        read_at = time.monotonic()
+        version = (await db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1))).scalar() or 0
+        with self._lock:
+            newer = self.version is None or version > self.version
+            if newer:
+                self.version = version
+            self._version_read_at = read_at
+        if newer:
+            self.listings.clear()
+            self.products.clear()
+        return version
+
+    @staticmethod
+    def etag(version: int) -> str:
+        return f'W/"catalog-{version}"'
+
+    @staticmethod
+    def listing_key(version, categoria=None, search=None, promocao=None, skip=0, limit=50, cursor=None, fields=None):
+        return (version, categoria, search, promocao, skip, limit, cursor, fields)
+
+    def get_listing(self, key):
+        return self.listings.get(key)
+
+    def set_listing(self, key, data):
+        return self.listings.set(key, data)
+
+    def get_product(self, version: int, product_id: int):
+        return self.products.get((version, product_id))
+
+    def set_product(self, version: int, product_id: int, data):
+        return self.products.set((version, product_id), data)
+
+    def invalidate(self, product_id: Optional[int] = None) -> None:
+        # A versão no banco já mudou com a escrita: o próximo request relê
+        self._version_read_at = 0.0
+        self.listings.clear()
+        if product_id is None:
+            self.products.clear()
+        else:
+            self.products.pop((self.version, product_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "listings": self.listings.stats(),
+            "products": self.products.stats()
+        }
+
+catalog_cache = CatalogCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "60")),
+    version_ttl=float(os.getenv("CATALOG_VERSION_TTL", "1"))
+)
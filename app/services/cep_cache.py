@@ -0,0 +1,110 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from app.database import SessionLocal
+from app.models.cep_cache import CepCache
+from app.services.cache import TTLCache, MISSING
+
+class CEPCache:
+    """Cache de endereços do ViaCEP em dois níveis.
+
+    Um LRU em memória fica na frente da tabela ``cep_cache``, que sobrevive a
+    restarts e é compartilhada entre workers. CEPs inexistentes também são
+    guardados, com TTL curto.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, memory_size: int = 1024):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self.db_hits = 0
+        self.db_misses = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.upstream_total_ms = 0.0
+        self.upstream_max_ms = 0.0
+
+    def get(self, cep: str) -> Any:
+        """Devolve o endereço, None (CEP inexistente em cache) ou MISSING"""
+        cached = self.memory.get(cep)
+        if cached is not MISSING:
+            return cached
+
+        row = self._db_get(cep)
+        if row is None:
+            with self._lock:
+                self.db_misses += 1
+            return MISSING
+
+        with self._lock:
+            self.db_hits += 1
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+        return self.memory.set(cep, row.endereco if row.found else None, ttl=remaining)
+
+    def set(self, cep: str, address: Optional[Dict[str, str]]) -> None:
+        ttl = self.ttl if address else self.negative_ttl
+        self.memory.set(cep, address, ttl=ttl)
+        self._db_set(cep, address, ttl)
+
+    def record_upstream(self, elapsed_ms: float, error: bool = False) -> None:
+        with self._lock:
+            self.upstream_calls += 1
+            self.upstream_total_ms += elapsed_ms
+            self.upstream_max_ms = max(self.upstream_max_ms, elapsed_ms)
+            if error:
+                self.upstream_errors += 1
+
+    def _db_get(self, cep: str) -> Optional[CepCache]:
+        db = SessionLocal()
+        try:
+            row = db.get(CepCache, cep)
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            return row
+        except Exception as e:
+            print(f"Warning: CEP cache read failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _db_set(self, cep: str, address: Optional[Dict[str, str]], ttl: float) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(CepCache(
+                cep=cep,
+                endereco=address,
+                found=address is not None,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            ))
+            db.commit()
+        except Exception as e:
+            # Outro worker pode ter gravado o mesmo CEP; o cache é best-effort
+            db.rollback()
+            print(f"Warning: CEP cache write failed: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.db_hits
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "upstream": {
+                "calls": self.upstream_calls,
+                "errors": self.upstream_errors,
+                "avg_ms": round(self.upstream_total_ms / self.upstream_calls, 2) if self.upstream_calls else 0.0,
+                "max_ms": round(self.upstream_max_ms, 2)
+            }
+        }
+
+cep_cache = CEPCache(
+    ttl=float(os.getenv("CEP_CACHE_TTL", str(30 * 24 * 3600))),
+    negative_ttl=float(os.getenv("CEP_NEGATIVE_TTL", "3600")),
+    memory_size=int(os.getenv("CEP_MEMORY_SIZE", "1024"))
+)
@@ -0,0 +1,167 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+class CircuitOpenError(requests.RequestException):
+    """O upstream está marcado como indisponível; a chamada nem sai."""
+
+class UpstreamBusyError(requests.RequestException):
+    """Limite de chamadas simultâneas para o host atingido."""
+
+class CircuitBreaker:
+    """Abre após ``failure_threshold`` falhas seguidas e tenta de novo depois
+    de ``reset_timeout`` segundos (meio-aberto: uma chamada de teste)."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, timer=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timer = timer
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.timer() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self) -> None:
+        """Devolve a vaga de teste do meio-aberto sem contar sucesso ou falha"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.timer()
+
+class HostPolicy:
+    def __init__(self, timeout: Tuple[float, float], max_concurrency: int,
+                 acquire_timeout: float, breaker: CircuitBreaker):
+        self.timeout = timeout
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.breaker = breaker
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+class OutboundHTTPClient:
+    """Camada única para chamadas HTTP externas (ViaCEP, Mercado Pago).
+
+    Uma ``requests.Session`` compartilhada mantém conexões keep-alive por
+    host; cada host tem timeout, limite de concorrência e circuit breaker
+    próprios. Os erros levantados herdam de ``requests.RequestException``.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 20,
+                 default_timeout: Tuple[float, float] = (3.05, 10.0)):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.default_timeout = default_timeout
+        self.pool_maxsize = pool_maxsize
+        self._policies: Dict[str, HostPolicy] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, timeout: Optional[Tuple[float, float]] = None,
+                  max_concurrency: Optional[int] = None, acquire_timeout: float = 1.0,
+                  failure_threshold: int = 5, reset_timeout: float = 30.0) -> HostPolicy:
+        policy = HostPolicy(
+            timeout=timeout or self.default_timeout,
+            max_concurrency=max_concurrency or self.pool_maxsize,
+            acquire_timeout=acquire_timeout,
+            breaker=CircuitBreaker(failure_threshold, reset_timeout)
+        )
+        with self._lock:
+            self._policies[host] = policy
+        return policy
+
+    def policy_for(self, host: str) -> HostPolicy:
+        with self._lock:
+            policy = self._policies.get(host)
+        return policy or self.configure(host)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        policy = self.policy_for(host)
+
+        if not policy.breaker.allow():
+            policy.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        if not policy.semaphore.acquire(timeout=policy.acquire_timeout):
+            policy.rejected += 1
+            # A vaga de teste do meio-aberto não foi usada
+            policy.breaker.release_trial()
+            raise UpstreamBusyError(f"Too many concurrent requests to {host}")
+
+        kwargs.setdefault("timeout", policy.timeout)
+        policy.calls += 1
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            policy.failures += 1
+            policy.breaker.record_failure()
+            raise
+        finally:
+            policy.semaphore.release()
+
+        if response.status_code >= 500:
+            policy.failures += 1
+            policy.breaker.record_failure()
+        else:
+            policy.breaker.record_success()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            policies = dict(self._policies)
+        return {
+            host: {
+                "state": policy.breaker.state,
+                "calls": policy.calls,
+                "failures": policy.failures,
+                "rejected": policy.rejected,
+                "max_concurrency": policy.max_concurrency,
+                "timeout": list(policy.timeout)
+            }
+            for host, policy in policies.items()
+        }
+
+http_client = OutboundHTTPClient()
+http_client.configure("viacep.com.br", timeout=(2.0, 3.0), max_concurrency=20)
+http_client.configure("api.mercadopago.com", timeout=(3.05, 15.0), max_concurrency=20)
@@ -0,0 +1,94 @@
+import asyncio
+import io
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from PIL import Image, ImageOps
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", "8"))
+
+class ImagePipelineBusy(Exception):
+    """Fila de imagens cheia; o chamador responde 503."""
+
+def resize_to_jpeg(data: bytes, max_side: int = 1024, quality: int = 85) -> bytes:
+    """Decode + resize + encode; roda dentro do processo do pool.
+
+    Em JPEG o ``draft`` pede ao decoder uma escala 1/2, 1/4 ou 1/8 já na
+    decodificação, então uma foto de 12 MP nem chega a ser expandida
+    inteira antes do ``thumbnail``.
+    """
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.width > max_side or image.height > max_side:
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+class ImagePipeline:
+    """Pool de processos para trabalho de imagem fora do event loop.
+
+    Igual ao PasswordHasher: ``workers`` jobs rodando, ``max_pending``
+    esperando e ``ImagePipelineBusy`` além disso. O pool só sobe no primeiro
+    uso (processos custam memória no Render) e é fechado no shutdown.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS, max_pending: int = IMAGE_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, fn, *args, block: bool = False) -> Future:
+        """Agenda no pool; ``block=True`` espera vaga (jobs de background)"""
+        if not self._slots.acquire(blocking=block):
+            self.rejected += 1
+            raise ImagePipelineBusy("Image processing queue is full")
+
+        self.submitted += 1
+        try:
+            future = self.executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def resize_to_jpeg(self, data: bytes, max_side: int = 1024, quality: int = 85) -> bytes:
+        return await self.run(resize_to_jpeg, data, max_side, quality)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "started": self._executor is not None,
+            "submitted": self.submitted,
+            "rejected": self.rejected
+        }
+
+image_pipeline = ImagePipeline()
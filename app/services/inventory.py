@@ -0,0 +1,151 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import case, delete, select, update
+from app.database import SessionLocal
+from app.models.product import Product
+from app.models.reservation import StockReservation
+from app.services.workers import BackgroundWorker
+
+RESERVATION_TTL = int(os.getenv("RESERVATION_TTL", "900"))
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "60"))
+RESERVATION_SWEEP_BATCH = int(os.getenv("RESERVATION_SWEEP_BATCH", "500"))
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids: List[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Insufficient stock for products {product_ids}")
+
+def merge_lines(items: Iterable[Dict[str, Any]]) -> Dict[int, int]:
+    """Soma as quantidades por produto (itens no formato de Order.items)"""
+    quantities: Dict[int, int] = {}
+    for item in items:
+        product_id = int(item["product_id"])
+        quantities[product_id] = quantities.get(product_id, 0) + int(item["quantidade"])
+    return quantities
+
+def _quantity_case(quantities: Dict[int, int]):
+    return case(quantities, value=Product.id, else_=0)
+
+def decrement_stock(db, items: Iterable[Dict[str, Any]]) -> None:
+    """Baixa o estoque de todas as linhas em um único UPDATE condicional.
+
+    ``WHERE estoque >= quantidade`` é avaliado linha a linha pelo banco com a
+    linha travada, então compras simultâneas do último item não vendem a
+    mais. Se alguma linha não casar, nada é baixado (savepoint) e
+    ``InsufficientStock`` é levantada com os produtos sem saldo.
+    """
+    quantities = merge_lines(items)
+    if not quantities:
+        return
+
+    quantity = _quantity_case(quantities)
+    savepoint = db.begin_nested()
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()), Product.estoque >= quantity)
+        .values(estoque=Product.estoque - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == len(quantities):
+        savepoint.commit()
+        return
+
+    savepoint.rollback()
+    short = db.execute(
+        select(Product.id).where(
+            Product.id.in_(quantities.keys()), Product.estoque < quantity
+        )
+    ).scalars().all()
+    missing = set(quantities) - set(db.execute(
+        select(Product.id).where(Product.id.in_(quantities.keys()))
+    ).scalars().all())
+    raise InsufficientStock(sorted(set(short) | missing))
+
+def restock(db, items: Iterable[Dict[str, Any]]) -> None:
+    """Compensação: devolve ao estoque as linhas de um pedido cancelado"""
+    quantities = merge_lines(items)
+    if not quantities:
+        return
+
+    quantity = _quantity_case(quantities)
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()))
+        .values(estoque=Product.estoque + quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+def reserve_stock(db, order, ttl: int = RESERVATION_TTL) -> List[StockReservation]:
+    """Segura as unidades do pedido por ``ttl`` segundos até o pagamento.
+
+    As linhas de produto são travadas em ordem de id (sem deadlock entre
+    checkouts concorrentes) e a disponibilidade é lida depois do lock, em
+    outro statement, para enxergar reservas recém-commitadas. ``db`` é a
+    Session síncrona; nos routers async use ``db.run_sync``. O commit fica
+    com o chamador.
+    """
+    quantities = merge_lines(order.items)
+    if not quantities:
+        return []
+
+    db.flush()
+    db.execute(
+        select(Product.id)
+        .where(Product.id.in_(quantities.keys()))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    available = dict(db.execute(
+        select(Product.id, Product.disponivel).where(Product.id.in_(quantities.keys()))
+    ).all())
+    short = [
+        product_id for product_id, quantidade in quantities.items()
+        if available.get(product_id, 0) < quantidade
+    ]
+    if short:
+        raise InsufficientStock(sorted(short))
+
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+    reservations = [
+        StockReservation(order_id=order.id, product_id=product_id, quantidade=quantidade, expires_at=expires_at)
+        for product_id, quantidade in quantities.items()
+    ]
+    db.add_all(reservations)
+    return reservations
+
+def release_reservations(db, order_id: int) -> None:
+    """Pagamento resolvido (baixado ou cancelado): a reserva deixa de contar"""
+    db.execute(
+        delete(StockReservation)
+        .where(StockReservation.order_id == order_id)
+        .execution_options(synchronize_session=False)
+    )
+
+def sweep_expired(limit: int = RESERVATION_SWEEP_BATCH) -> int:
+    """Apaga em um único DELETE até ``limit`` reservas vencidas.
+
+    Reservas vencidas já não contam em ``Product.disponivel``; o sweeper só
+    mantém a tabela (e o índice) pequena.
+    """
+    db = SessionLocal()
+    try:
+        expired = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at <= datetime.utcnow())
+            .limit(limit)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+reservation_sweeper = BackgroundWorker(
+    "Reservation sweeper", sweep_expired, RESERVATION_SWEEP_BATCH, RESERVATION_SWEEP_INTERVAL
+)
@@ -1,12 +1,47 @@
 import mercadopago
+from mercadopago.config import RequestOptions
+from mercadopago.errors.exceptions import MPServerError
+from mercadopago.http import HttpClient
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.services.http_client import http_client
+
+class PooledHttpClient(HttpClient):
+    """Transporte do SDK sobre o http_client compartilhado.
+
+    O HttpClient padrão do SDK abre uma Session (e uma conexão TLS) por
+    chamada; aqui as conexões são reaproveitadas e passam pelo timeout,
+    limite de concorrência e circuit breaker do host.
+    """
+
+    def request(self, method, url, maxretries=None, **kwargs):
+        # Retries ficam a cargo do chamador; o breaker já corta upstream instável.
+        # O timeout do SDK (60s por padrão) é trocado pelo da política do host.
+        kwargs.pop("retry_on", None)
+        kwargs.pop("backoff_factor", None)
+        kwargs.pop("timeout", None)
+
+        api_result = http_client.request(method, url, **kwargs)
+        response = {"status": api_result.status_code, "response": None}
+        if api_result.status_code != 204 and api_result.content:
+            # Mesmo erro do HttpClient padrão do SDK para corpo que não é JSON
+            try:
+                response["response"] = api_result.json()
+            except ValueError as exc:
+                raise MPServerError(
+                    api_result.status_code,
+                    {"message": "Invalid JSON in response body", "error": "invalid_response"},
+                ) from exc
+        return response
 
 class MercadoPagoService:
     def __init__(self):
-        self.sdk = mercadopago.SDK(os.getenv("MERCADOPAGO_ACCESS_TOKEN"))
+        self.sdk = mercadopago.SDK(
+            os.getenv("MERCADOPAGO_ACCESS_TOKEN"),
+            http_client=PooledHttpClient()
+        )
     
-    def create_payment(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_payment(self, order_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         payment_data = {
             "transaction_amount": order_data["total"],
             "description": f"Pedido Moda Karina Store #{order_data['order_id']}",
@@ -22,9 +57,13 @@ class MercadoPagoService:
         if order_data.get("payment_method") == "pix":
             payment_data["payment_method_id"] = "pix"
         
-        payment_response = self.sdk.payment().create(payment_data)
+        request_options = None
+        if idempotency_key:
+            request_options = RequestOptions(custom_headers={"x-idempotency-key": idempotency_key})
+        
+        payment_response = self.sdk.payment().create(payment_data, request_options)
         return payment_response["response"]
     
     def get_payment(self, payment_id: str) -> Dict[str, Any]:
         payment_response = self.sdk.payment().get(payment_id)
-        return payment_response["response"]
\ No newline at end of file
+        return payment_response["response"]
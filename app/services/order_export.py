@@ -0,0 +1,94 @@
+import csv
+import io
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+import orjson
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.user import User
+
+EXPORT_YIELD_PER = int(os.getenv("ORDER_EXPORT_YIELD_PER", "1000"))
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+ADDRESS_FIELDS = ("cep", "logradouro", "numero", "complemento", "bairro", "cidade", "uf")
+ITEM_FIELDS = ("product_id", "nome", "preco", "quantidade", "subtotal")
+# Uma linha por item do pedido; pedido sem itens sai em uma linha com os campos de item vazios
+EXPORT_COLUMNS = (
+    ["order_id", "created_at", "status", "user_id", "email", "total", "frete", "payment_id", "payment_method"]
+    + [f"endereco_{name}" for name in ADDRESS_FIELDS]
+    + ["item_index"] + [f"item_{name}" for name in ITEM_FIELDS]
+)
+
+def export_statement(desde: Optional[date] = None, ate: Optional[date] = None, status: Optional[List[str]] = None):
+    # Colunas (não entidades ORM): nada vai para o identity map da sessão
+    query = (
+        select(
+            Order.id, Order.created_at, Order.status, Order.user_id, User.email, Order.total,
+            Order.frete, Order.payment_id, Order.payment_method, Order.endereco, Order.items
+        )
+        .outerjoin(User, User.id == Order.user_id)
+        .order_by(Order.id)
+    )
+    if desde:
+        query = query.where(Order.created_at >= datetime.combine(desde, time.min))
+    if ate:
+        # Data final inclusiva
+        query = query.where(Order.created_at < datetime.combine(ate + timedelta(days=1), time.min))
+    if status:
+        query = query.where(Order.status.in_(status))
+    return query
+
+def flatten_order(row) -> Iterator[Dict[str, Any]]:
+    order = {
+        "order_id": row.id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "status": row.status,
+        "user_id": row.user_id,
+        "email": row.email,
+        "total": row.total,
+        "frete": row.frete,
+        "payment_id": row.payment_id,
+        "payment_method": row.payment_method,
+    }
+    endereco = row.endereco or {}
+    for name in ADDRESS_FIELDS:
+        order[f"endereco_{name}"] = endereco.get(name)
+
+    items = row.items or [{}]
+    for index, item in enumerate(items):
+        line = dict(order, item_index=index if row.items else None)
+        for name in ITEM_FIELDS:
+            line[f"item_{name}"] = item.get(name)
+        yield line
+
+def _csv_chunk(lines: List[Dict[str, Any]], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    if header:
+        writer.writeheader()
+    writer.writerows(lines)
+    return buffer.getvalue().encode()
+
+def _ndjson_chunk(lines: List[Dict[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(line) + b"\n" for line in lines)
+
+def iter_export(formato: str, statement, yield_per: int = EXPORT_YIELD_PER) -> Iterator[bytes]:
+    """Gera o arquivo em pedaços de ``yield_per`` pedidos.
+
+    Usa uma sessão própria (o request pode terminar antes do arquivo) com
+    ``stream_results``: no Postgres é um cursor do lado do servidor, então a
+    memória não cresce com o número de pedidos. O StreamingResponse consome
+    este gerador no threadpool; se o cliente desconectar, o ``finally``
+    fecha o cursor e devolve a conexão.
+    """
+    db = SessionLocal()
+    try:
+        if formato == "csv":
+            yield _csv_chunk([], header=True)
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=yield_per))
+        for rows in result.partitions(yield_per):
+            lines = [line for row in rows for line in flatten_order(row)]
+            yield _csv_chunk(lines) if formato == "csv" else _ndjson_chunk(lines)
+    finally:
+        db.close()
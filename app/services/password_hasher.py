@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from passlib.context import CryptContext
+
+class PasswordHasherBusy(Exception):
+    """Fila do hashing cheia; o chamador responde 503."""
+
+class PasswordHasher:
+    """Executor próprio e limitado para bcrypt (register/login).
+
+    O bcrypt libera o GIL, então threads bastam; o ponto é não dividir o
+    threadpool do Starlette com o catálogo. No máximo ``workers`` hashes
+    rodam ao mesmo tempo e ``max_pending`` esperam; além disso
+    ``PasswordHasherBusy`` é levantada na hora, sem enfileirar.
+    """
+
+    def __init__(self, context: CryptContext, workers: int = 2, max_pending: int = 16):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self.submitted = 0
+        self.rejected = 0
+
+    async def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+
+        self.submitted += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Devolve (válida, novo_hash); novo_hash vem quando o custo mudou"""
+        return await self._submit(self.context.verify_and_update, password, hashed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "rejected": self.rejected
+        }
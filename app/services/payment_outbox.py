@@ -0,0 +1,125 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from sqlalchemy import or_, select
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.outbox import PaymentOutbox
+from app.services.mercadopago import MercadoPagoService
+from app.services.workers import BackgroundWorker, claim_rows
+
+OUTBOX_BATCH_SIZE = int(os.getenv("PAYMENT_OUTBOX_BATCH_SIZE", "10"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("PAYMENT_OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("PAYMENT_OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_LEASE_SECONDS = 60
+OUTBOX_MAX_BACKOFF = 300
+
+def enqueue_payment(db, order: Order, email: str, nome: str) -> PaymentOutbox:
+    """Registra a criação do pagamento na mesma transação do pedido.
+
+    ``db`` pode ser a Session ou o AsyncSession/adapter: só usa ``add``,
+    o commit fica com o chamador.
+    """
+    entry = PaymentOutbox(
+        order=order,
+        payload={
+            "total": order.total,
+            "email": email,
+            "nome": nome,
+            "payment_method": order.payment_method
+        },
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(entry)
+    return entry
+
+def payment_status(entry: PaymentOutbox, order: Order) -> Dict[str, Any]:
+    return {
+        "order_id": order.id,
+        "status": entry.status if entry else "unknown",
+        "payment_id": order.payment_id,
+        "payment": entry.result if entry else None,
+        "attempts": entry.attempts if entry else 0,
+        "last_error": entry.last_error if entry else None
+    }
+
+def backoff_seconds(attempts: int) -> float:
+    return min(2 ** attempts, OUTBOX_MAX_BACKOFF)
+
+def claim_due(db, limit: int = OUTBOX_BATCH_SIZE) -> List[int]:
+    """Marca até ``limit`` entradas vencidas como ``processing`` com um lease.
+
+    No Postgres o ``SKIP LOCKED`` deixa vários workers drenarem a fila sem
+    pegar a mesma entrada; um lease vencido (worker morto) volta à fila.
+    """
+    now = datetime.utcnow()
+    query = (
+        select(PaymentOutbox.id)
+        .where(
+            or_(PaymentOutbox.status == "pending", PaymentOutbox.status == "processing"),
+            PaymentOutbox.next_attempt_at <= now
+        )
+        .order_by(PaymentOutbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return claim_rows(db, PaymentOutbox, db.execute(query).scalars().all(), now, OUTBOX_LEASE_SECONDS)
+
+def process_entry(db, entry_id: int, mp_service: MercadoPagoService) -> str:
+    entry = db.get(PaymentOutbox, entry_id)
+    if entry is None or entry.status not in ("processing", "pending"):
+        return "skipped"
+
+    payload = dict(entry.payload, order_id=entry.order_id)
+    try:
+        # Chave de idempotência: um retry após timeout não duplica a cobrança
+        response = mp_service.create_payment(payload, idempotency_key=f"order-{entry.order_id}")
+        if not response or not response.get("id"):
+            raise ValueError(f"Unexpected Mercado Pago response: {response}")
+    except Exception as e:
+        entry.attempts += 1
+        entry.last_error = str(e)[:1000]
+        status = "failed" if entry.attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+        entry.status = status
+        if status == "pending":
+            entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(entry.attempts))
+        db.commit()
+        return status
+
+    entry.status = "done"
+    entry.attempts += 1
+    entry.last_error = None
+    entry.result = response
+    order = db.get(Order, entry.order_id)
+    if order is not None:
+        order.payment_id = str(response.get("id"))
+    db.commit()
+    return "done"
+
+def dispatch_once(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Processa um lote da fila; devolve quantas entradas foram tentadas"""
+    db = SessionLocal()
+    try:
+        entry_ids = claim_due(db, limit)
+        if not entry_ids:
+            return 0
+        mp_service = MercadoPagoService()
+        for entry_id in entry_ids:
+            process_entry(db, entry_id, mp_service)
+        return len(entry_ids)
+    finally:
+        db.close()
+
+# Task asyncio que drena o outbox em background; checkouts chamam notify()
+payment_dispatcher = BackgroundWorker(
+    "Payment dispatcher", dispatch_once, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL
+)
+
+if __name__ == "__main__":
+    # Worker dedicado: python -m app.services.payment_outbox
+    import time
+    while True:
+        if dispatch_once() < OUTBOX_BATCH_SIZE:
+            time.sleep(OUTBOX_POLL_INTERVAL)
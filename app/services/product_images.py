@@ -0,0 +1,229 @@
+import base64
+import hashlib
+import io
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from PIL import Image, ImageOps
+from sqlalchemy import func, select
+from app.database import SessionLocal
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.services.blob_store import blob_store, blob_url
+from app.services.catalog_cache import catalog_cache
+from app.services.http_client import http_client
+from app.services.image_pipeline import image_pipeline
+
+# Lado máximo de cada tamanho; "card" é o das listagens e do carousel
+VARIANT_SIZES = {"thumb": 160, "card": 480, "zoom": 1200}
+PRODUCT_IMAGE_MAX_BYTES = int(os.getenv("PRODUCT_IMAGE_MAX_BYTES", str(15 * 1024 * 1024)))
+IMAGE_DOWNLOAD_CHUNK = 64 * 1024
+VARIANT_BACKFILL_BATCH = 100
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+def load_source(source: str) -> bytes:
+    """Bytes da imagem de origem: data URL (base64) ou URL http(s).
+
+    O download é lido em pedaços e abortado assim que passa de
+    ``PRODUCT_IMAGE_MAX_BYTES``; uma URL apontando para um arquivo enorme
+    não chega a ficar inteira na memória.
+    """
+    too_large = ValueError(f"Image larger than {PRODUCT_IMAGE_MAX_BYTES} bytes")
+    if source.startswith("data:"):
+        encoded = source.split(",", 1)[1]
+        if len(encoded) * 3 // 4 > PRODUCT_IMAGE_MAX_BYTES:
+            raise too_large
+        return base64.b64decode(encoded)
+
+    with http_client.get(source, stream=True) as response:
+        response.raise_for_status()
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > PRODUCT_IMAGE_MAX_BYTES:
+            raise too_large
+        chunks, size = [], 0
+        for chunk in response.iter_content(IMAGE_DOWNLOAD_CHUNK):
+            size += len(chunk)
+            if size > PRODUCT_IMAGE_MAX_BYTES:
+                raise too_large
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+def render_variants(data: bytes) -> Dict[str, Dict[str, bytes]]:
+    """Gera thumb/card/zoom em JPEG e WebP; roda no pool de processos"""
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        largest = max(VARIANT_SIZES.values())
+        image.draft("RGB", (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    rendered = {}
+    # Do maior para o menor: cada tamanho parte do anterior, já reduzido
+    for name, size in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        formats = {}
+        for extension, options in (("jpg", {"format": "JPEG", "quality": 85, "optimize": True}),
+                                   ("webp", {"format": "WEBP", "quality": 80, "method": 4})):
+            buffer = io.BytesIO()
+            image.save(buffer, **options)
+            formats[extension] = buffer.getvalue()
+        rendered[name] = formats
+    return rendered
+
+def store_variants(data: bytes) -> Dict[str, Dict[str, str]]:
+    digest = blob_store.digest(data)
+    keys = {
+        name: {extension: f"{digest}.{name}.{extension}" for extension in ("jpg", "webp")}
+        for name in VARIANT_SIZES
+    }
+    # Mesmos bytes de origem (outro produto, outra URL) já renderizados
+    if not all(blob_store.exists(key) for formats in keys.values() for key in formats.values()):
+        rendered = image_pipeline.submit(render_variants, data, block=True).result()
+        for name, formats in rendered.items():
+            for extension, blob in formats.items():
+                blob_store.put(keys[name][extension], blob)
+    return {
+        name: {extension: blob_url(key) for extension, key in formats.items()}
+        for name, formats in keys.items()
+    }
+
+def generate_product_variants(product_id: int) -> int:
+    """Sincroniza product_images com Product.imagens; devolve quantas imagens
+    foram processadas. Origem com o mesmo hash não é baixada nem renderizada
+    de novo. Roda como BackgroundTask depois do create/update do produto.
+    """
+    db = SessionLocal()
+    try:
+        product = db.get(Product, product_id)
+        if product is None:
+            return 0
+        sources = list(product.imagens or [])
+        hashes = [source_hash(source) for source in sources]
+
+        existing = {
+            row.position: row for row in db.execute(
+                select(ProductImage).where(ProductImage.product_id == product_id)
+            ).scalars().all()
+        }
+        known = {
+            row.source_hash: row.variants for row in db.execute(
+                select(ProductImage).where(ProductImage.source_hash.in_(hashes))
+            ).scalars().all()
+        } if hashes else {}
+
+        processed = 0
+        for position, (source, digest) in enumerate(zip(sources, hashes)):
+            row = existing.pop(position, None)
+            if row is not None and row.source_hash == digest:
+                continue
+
+            variants = known.get(digest)
+            if variants is None:
+                try:
+                    variants = store_variants(load_source(source))
+                except Exception as e:
+                    # A listagem cai para a imagem original
+                    print(f"Product {product_id} image {position}: {e}")
+                    if row is not None:
+                        db.delete(row)
+                    continue
+                known[digest] = variants
+                processed += 1
+
+            if row is None:
+                db.add(ProductImage(
+                    product_id=product_id, position=position, source_hash=digest, variants=variants
+                ))
+            else:
+                row.source_hash = digest
+                row.variants = variants
+
+        # Imagens removidas do produto
+        for row in existing.values():
+            db.delete(row)
+        db.commit()
+    finally:
+        db.close()
+
+    catalog_cache.invalidate(product_id)
+    return processed
+
+async def variants_for(db, product_ids: Iterable[int]) -> Dict[int, Dict[int, dict]]:
+    """{product_id: {posição: variantes}} em uma query (db async ou adapter)"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    result = await db.execute(
+        select(ProductImage.product_id, ProductImage.position, ProductImage.variants)
+        .where(ProductImage.product_id.in_(product_ids))
+    )
+    variants: Dict[int, Dict[int, dict]] = {}
+    for product_id, position, row_variants in result.all():
+        variants.setdefault(product_id, {})[position] = row_variants
+    return variants
+
+def view_images(sources: Optional[List[str]], variants: Dict[int, dict], size: str) -> Tuple[List[str], List[Optional[str]]]:
+    """(JPEG, WebP) do tamanho pedido, posição a posição.
+
+    Sem variante ainda, o JPEG é a original e o WebP fica None: repetir a
+    original (muitas vezes um data URL enorme) dobraria o payload.
+    """
+    jpgs, webps = [], []
+    for position, source in enumerate(sources or []):
+        sized = variants.get(position, {}).get(size)
+        jpgs.append(sized["jpg"] if sized else source)
+        webps.append(sized["webp"] if sized else None)
+    return jpgs, webps
+
+def products_missing_variants(db, after_id: int = 0, limit: int = VARIANT_BACKFILL_BATCH) -> List[int]:
+    """Ativos com menos linhas em product_images do que imagens, em ordem de id"""
+    counts = (
+        select(ProductImage.product_id, func.count().label("total"))
+        .group_by(ProductImage.product_id)
+        .subquery()
+    )
+    return db.execute(
+        select(Product.id)
+        .outerjoin(counts, counts.c.product_id == Product.id)
+        .where(
+            Product.is_active == True,
+            Product.id > after_id,
+            func.coalesce(func.json_array_length(Product.imagens), 0) > func.coalesce(counts.c.total, 0)
+        )
+        .order_by(Product.id)
+        .limit(limit)
+    ).scalars().all()
+
+def backfill_variants(batch_size: int = VARIANT_BACKFILL_BATCH) -> Tuple[int, int]:
+    """Gera as variantes que faltam no catálogo; devolve (produtos, imagens processadas).
+
+    Produtos cadastrados antes do pipeline (ou cujo download falhou) nunca
+    passaram pelo ``generate_product_variants``. Anda por id, então pode ser
+    interrompido e rodado de novo; imagens que já têm variante são puladas.
+    """
+    products = images = 0
+    after_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            product_ids = products_missing_variants(db, after_id, batch_size)
+        finally:
+            db.close()
+        if not product_ids:
+            return products, images
+        for product_id in product_ids:
+            images += generate_product_variants(product_id)
+            products += 1
+        after_id = product_ids[-1]
+
+if __name__ == "__main__":
+    # Backfill: python -m app.services.product_images
+    try:
+        done_products, done_images = backfill_variants()
+        print(f"Variantes geradas: {done_images} imagens em {done_products} produtos")
+    finally:
+        image_pipeline.shutdown()
+
@@ -0,0 +1,162 @@
+import codecs
+import csv
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import func
+from app.models.product import Product
+
+IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS = 100  # Detalhes devolvidos; o total de erros é sempre contado
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+# Colunas gravadas pela importação; as demais ficam como estão no produto
+IMPORT_COLUMNS = ("nome", "descricao", "preco", "imagens", "categoria", "promocao", "preco_promocional", "estoque")
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def import_format(content_type: Optional[str], formato: Optional[str] = None) -> Optional[str]:
+    if formato in ("csv", "ndjson"):
+        return formato
+    return IMPORT_FORMATS.get((content_type or "").split(";")[0].strip().lower())
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Linhas do corpo conforme ele chega (UTF-8, com BOM opcional)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+async def iter_records(chunks: AsyncIterator[bytes], formato: str) -> AsyncIterator[Tuple[int, Any]]:
+    """``(linha, registro)``; registro é um dict ou a mensagem de erro de parse.
+
+    CSV: a primeira linha é o cabeçalho e um campo entre aspas pode ocupar
+    várias linhas (junta linhas até as aspas fecharem). ``imagens`` no CSV
+    são URLs separadas por ``|``.
+    """
+    header = None
+    record, start = "", 0
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if formato == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield number, f"JSON inválido: {e}"
+                continue
+            yield number, data if isinstance(data, dict) else "Cada linha deve ser um objeto JSON"
+            continue
+
+        if not record:
+            start = number
+        record += line
+        if record.count('"') % 2:
+            continue  # Campo entre aspas continua na próxima linha
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, f"Esperadas {len(header)} colunas, encontradas {len(values)}"
+            continue
+        row = {name: value for name, value in zip(header, values) if value != ""}
+        if "imagens" in row:
+            row["imagens"] = [url.strip() for url in row["imagens"].split("|") if url.strip()]
+        yield start, row
+
+    if record:
+        yield start, "Aspas não fechadas no fim do arquivo"
+
+def _upsert_statement(dialect: str, rows: List[Dict[str, Any]]):
+    insert = _INSERTS[dialect]
+    statement = insert(Product).values(rows)
+    updates = {name: getattr(statement.excluded, name) for name in IMPORT_COLUMNS}
+    # Reimportar um SKU desativado o traz de volta ao catálogo
+    updates.update(is_active=True, updated_at=func.now())
+    return statement.on_conflict_do_update(index_elements=["sku"], set_=updates)
+
+def _write_fallback(db, rows: List[Dict[str, Any]]) -> None:
+    # Dialetos sem ON CONFLICT: um SELECT por lote e o ORM grava
+    existing = {
+        product.sku: product for product in db.execute(
+            select(Product).where(Product.sku.in_([row["sku"] for row in rows]))
+        ).scalars().all()
+    }
+    for row in rows:
+        product = existing.get(row["sku"])
+        if product is None:
+            db.add(Product(**row))
+            continue
+        for name in IMPORT_COLUMNS:
+            setattr(product, name, row[name])
+        product.is_active = True
+    db.flush()
+
+def upsert_products(db, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Grava um lote (já validado) com um INSERT multi-linha ... ON CONFLICT (sku).
+
+    ``rows`` traz ``sku`` e todas as ``IMPORT_COLUMNS``. ``db`` é a Session
+    síncrona; faz commit do lote. Se o lote falhar no banco, as linhas são
+    regravadas uma a uma (savepoint) para isolar as ruins. Devolve
+    ``created``, ``updated``, ``failed`` ([(sku, erro)]) e ``image_ids``
+    (produtos gravados que têm imagens).
+    """
+    skus = [row["sku"] for row in rows]
+    known = set(db.execute(select(Product.sku).where(Product.sku.in_(skus))).scalars().all())
+    dialect = db.get_bind().dialect.name
+
+    def write(batch):
+        if dialect in _INSERTS:
+            db.execute(_upsert_statement(dialect, batch))
+        else:
+            _write_fallback(db, batch)
+
+    failed = []
+    try:
+        write(rows)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        for row in rows:
+            savepoint = db.begin_nested()
+            try:
+                write([row])
+                savepoint.commit()
+            except SQLAlchemyError as e:
+                savepoint.rollback()
+                failed.append((row["sku"], str(getattr(e, "orig", e))[:300]))
+        db.commit()
+
+    failed_skus = {sku for sku, _ in failed}
+    written = [sku for sku in skus if sku not in failed_skus]
+    # Só produtos com imagens precisam gerar variantes
+    with_images = [row["sku"] for row in rows if row["imagens"] and row["sku"] not in failed_skus]
+    image_ids = db.execute(
+        select(Product.id).where(Product.sku.in_(with_images))
+    ).scalars().all() if with_images else []
+    return {
+        "created": sum(1 for sku in written if sku not in known),
+        "updated": sum(1 for sku in written if sku in known),
+        "failed": failed,
+        "image_ids": image_ids
+    }
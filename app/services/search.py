@@ -0,0 +1,119 @@
+import re
+from sqlalchemy import event, func, literal_column, or_, text
+from sqlalchemy.sql import column, table
+from app.models.product import Product
+
+# Schema da busca: vem da revisão 0007 do Alembic; bancos criados pelo
+# create_all (testes, benchmarks), pelo after_create de products no fim deste módulo.
+# Configuração de busca do Postgres: stemming português + unaccent
+PG_TS_CONFIG = "pt_unaccent"
+
+PG_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{PG_TS_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {PG_TS_CONFIG} (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION {PG_TS_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+    # Coluna gerada: o Postgres mantém o vetor a cada INSERT/UPDATE de produto
+    f"""
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{PG_TS_CONFIG}'::regconfig, coalesce(nome, '')), 'A') ||
+        setweight(to_tsvector('{PG_TS_CONFIG}'::regconfig, coalesce(descricao, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+# Fallback local: tabela FTS5 de conteúdo externo mantida por triggers
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        nome, descricao, content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, nome, descricao) VALUES (new.id, new.nome, new.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, nome, descricao)
+        VALUES ('delete', old.id, old.nome, old.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF nome, descricao ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, nome, descricao)
+        VALUES ('delete', old.id, old.nome, old.descricao);
+        INSERT INTO products_fts(rowid, nome, descricao) VALUES (new.id, new.nome, new.descricao);
+    END
+    """,
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+class ProductSearch:
+    """Busca textual de produtos com índice por dialeto.
+
+    Postgres usa ``tsvector`` + GIN com stemming português e unaccent;
+    SQLite usa FTS5 (sem stemming, mas ignorando acentos). Outros dialetos
+    caem no ILIKE antigo.
+    """
+
+    @staticmethod
+    def setup(connection):
+        """DDL do índice de busca; a revisão 0007 do Alembic faz o mesmo"""
+        statements = {"postgresql": PG_SETUP, "sqlite": SQLITE_SETUP}.get(connection.dialect.name, [])
+        for statement in statements:
+            connection.execute(text(statement))
+
+    @staticmethod
+    def fts5_query(search: str) -> str:
+        # Cada termo vira um prefixo entre aspas para não interpretar a sintaxe do FTS5
+        terms = re.findall(r"\w+", search, flags=re.UNICODE)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    @staticmethod
+    def apply(query, search: str, dialect: str):
+        """Filtra ``query`` (um ``select(Product)``) por ``search`` ordenando por relevância"""
+        if dialect == "postgresql":
+            vector = literal_column("products.search_vector")
+            ts_query = func.websearch_to_tsquery(
+                literal_column(f"'{PG_TS_CONFIG}'::regconfig"), search
+            )
+            return query.where(vector.op("@@")(ts_query)).order_by(
+                func.ts_rank_cd(vector, ts_query).desc(), Product.id
+            )
+
+        if dialect == "sqlite":
+            match = ProductSearch.fts5_query(search)
+            if not match:
+                return query
+            fts_table = table("products_fts", column("rowid"))
+            fts = literal_column("products_fts")
+            return (
+                query.join(fts_table, fts_table.c.rowid == Product.id)
+                .where(fts.op("MATCH")(match))
+                .order_by(func.bm25(fts), Product.id)
+            )
+
+        return query.where(or_(
+            Product.nome.ilike(f"%{search}%"),
+            Product.descricao.ilike(f"%{search}%")
+        ))
+
+@event.listens_for(Product.__table__, "after_create")
+def _setup_after_create(target, connection, **kw):
+    # Só quando o create_all cria a tabela products (testes, benchmarks);
+    # bancos migrados recebem o mesmo pela revisão 0007
+    ProductSearch.setup(connection)
+
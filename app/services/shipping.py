@@ -0,0 +1,112 @@
+import json
+import os
+from bisect import bisect_right
+from typing import Dict, Optional
+
+# Faixas de CEP por UF (Correios), ordenadas pelo início da faixa
+CEP_RANGES = [
+    (1000000, 19999999, "SP"),
+    (20000000, 28999999, "RJ"),
+    (29000000, 29999999, "ES"),
+    (30000000, 39999999, "MG"),
+    (40000000, 48999999, "BA"),
+    (49000000, 49999999, "SE"),
+    (50000000, 56999999, "PE"),
+    (57000000, 57999999, "AL"),
+    (58000000, 58999999, "PB"),
+    (59000000, 59999999, "RN"),
+    (60000000, 63999999, "CE"),
+    (64000000, 64999999, "PI"),
+    (65000000, 65999999, "MA"),
+    (66000000, 68899999, "PA"),
+    (68900000, 68999999, "AP"),
+    (69000000, 69299999, "AM"),
+    (69300000, 69399999, "RR"),
+    (69400000, 69899999, "AM"),
+    (69900000, 69999999, "AC"),
+    (70000000, 72799999, "DF"),
+    (72800000, 72999999, "GO"),
+    (73000000, 73699999, "DF"),
+    (73700000, 76799999, "GO"),
+    (76800000, 76999999, "RO"),
+    (77000000, 77999999, "TO"),
+    (78000000, 78899999, "MT"),
+    (79000000, 79999999, "MS"),
+    (80000000, 87999999, "PR"),
+    (88000000, 89999999, "SC"),
+    (90000000, 99999999, "RS"),
+]
+
+# Tabela padrão (a mesma simulação que rodava em ViaCEPService)
+DEFAULT_RATES = {
+    "frete_gratis_acima": 150.0,
+    "prazo_frete_gratis": 5,
+    "frete_padrao": 20.0,
+    "prazo_padrao": 10,
+    "frete_cep_desconhecido": 15.0,
+    "prazo_cep_desconhecido": 10,
+    "frete_por_estado": {
+        "SP": 10.0, "RJ": 12.0, "MG": 15.0, "RS": 18.0,
+        "PR": 16.0, "SC": 17.0, "GO": 20.0, "DF": 18.0,
+        "BA": 22.0, "PE": 25.0, "CE": 28.0, "AM": 35.0
+    },
+    "prazo_por_estado": {"SP": 7, "RJ": 7, "MG": 7}
+}
+
+class ShippingEngine:
+    """Cotação de frete sem rede: UF pela faixa do CEP + tabela de preços.
+
+    O ViaCEP só é necessário quando o endereço completo (logradouro) é
+    exigido; para o frete basta a UF, resolvida por busca binária.
+    """
+
+    def __init__(self, rates: Optional[Dict] = None, ranges=CEP_RANGES):
+        self.rates = dict(DEFAULT_RATES)
+        if rates:
+            self.rates.update(rates)
+        self._starts = [start for start, _, _ in ranges]
+        self._ranges = ranges
+
+    @classmethod
+    def from_env(cls):
+        # SHIPPING_RATES_FILE aponta para um JSON que sobrescreve DEFAULT_RATES
+        path = os.getenv("SHIPPING_RATES_FILE")
+        if not path:
+            return cls()
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def normalize_cep(cep: str) -> Optional[int]:
+        digits = cep.replace("-", "").replace(".", "").strip()
+        if len(digits) != 8 or not digits.isdigit():
+            return None
+        return int(digits)
+
+    def uf_for_cep(self, cep: str) -> Optional[str]:
+        value = self.normalize_cep(cep)
+        if value is None:
+            return None
+
+        index = bisect_right(self._starts, value) - 1
+        if index < 0:
+            return None
+        _, end, uf = self._ranges[index]
+        return uf if value <= end else None
+
+    def quote(self, cep: str, total: float) -> Dict[str, float]:
+        rates = self.rates
+
+        # Frete grátis acima do valor configurado
+        if total >= rates["frete_gratis_acima"]:
+            return {"frete": 0.0, "prazo": rates["prazo_frete_gratis"]}
+
+        uf = self.uf_for_cep(cep)
+        if not uf:
+            return {"frete": rates["frete_cep_desconhecido"], "prazo": rates["prazo_cep_desconhecido"]}
+
+        frete = rates["frete_por_estado"].get(uf, rates["frete_padrao"])
+        prazo = rates["prazo_por_estado"].get(uf, rates["prazo_padrao"])
+        return {"frete": frete, "prazo": prazo}
+
+shipping_engine = ShippingEngine.from_env()
@@ -0,0 +1,62 @@
+import os
+from typing import Any, Dict, Optional
+from sqlalchemy import event, inspect
+from app.models.user import User
+from app.services.cache import TTLCache
+
+class UserPrincipal:
+    """Só o que a autenticação precisa; sem foto/bio (que podem ser enormes).
+
+    Handlers que precisam do ``User`` completo usam ``get_current_user_row``
+    ou carregam pelo ``id``.
+    """
+
+    __slots__ = ("id", "email", "role", "is_active")
+
+    def __init__(self, id: int, email: str, role: str, is_active: bool):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+
+class UserCache:
+    """Principais por ``user_id`` do JWT (ou ``sub`` em tokens sem id).
+
+    O TTL curto limita o atraso entre instâncias; no próprio processo a
+    entrada cai em qualquer UPDATE/DELETE de ``User`` feito pelo ORM.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.principals = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key(user_id: Optional[int], email: str):
+        return ("id", int(user_id)) if user_id is not None else ("email", email)
+
+    def get(self, user_id: Optional[int], email: str):
+        return self.principals.get(self.key(user_id, email))
+
+    def set(self, user_id: Optional[int], email: str, principal: UserPrincipal) -> None:
+        self.principals.set(self.key(user_id, email), principal)
+
+    def invalidate(self, user_id: int, email: Optional[str] = None) -> None:
+        self.principals.pop(self.key(user_id, email))
+        if email is not None:
+            self.principals.pop(self.key(None, email))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.principals.stats()
+
+user_cache = UserCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "30"))
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_user(mapper, connection, target):
+    # Perfil, role ou is_active mudaram: o próximo request relê do banco.
+    # Tokens sem user_id são indexados pelo email antigo se ele mudou
+    user_cache.invalidate(target.id, target.email)
+    for email in inspect(target).attrs.email.history.deleted:
+        user_cache.invalidate(target.id, email)
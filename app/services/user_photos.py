@@ -0,0 +1,60 @@
+import base64
+import binascii
+import io
+import os
+from typing import Any, Dict
+from PIL import Image, ImageOps
+from app.services.blob_store import blob_store, blob_url
+
+USER_PHOTO_MAX_BYTES = int(os.getenv("USER_PHOTO_MAX_BYTES", str(5 * 1024 * 1024)))
+# Lado máximo de cada variante do avatar
+AVATAR_VARIANTS = {"thumb": 96, "medium": 320}
+FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+class InvalidImage(Exception):
+    pass
+
+def store_user_photo(data: bytes) -> Dict[str, Any]:
+    """Grava o original e as variantes; devolve a referência para User.foto.
+
+    Trabalho de CPU (decode/resize): chame via run_in_threadpool. Reenviar a
+    mesma foto não regrava nada.
+    """
+    if len(data) > USER_PHOTO_MAX_BYTES:
+        raise InvalidImage(f"Image larger than {USER_PHOTO_MAX_BYTES} bytes")
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise InvalidImage(f"Invalid image: {e}")
+    extension = FORMATS.get(image.format)
+    if extension is None:
+        raise InvalidImage(f"Unsupported image format: {image.format}")
+
+    digest = blob_store.digest(data)
+    key = blob_store.put(f"{digest}.{extension}", data)
+
+    variants = {}
+    for name, size in AVATAR_VARIANTS.items():
+        variant_key = f"{digest}.{name}.jpg"
+        if not blob_store.exists(variant_key):
+            variant = ImageOps.exif_transpose(image).convert("RGB")
+            variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format="JPEG", quality=85, optimize=True)
+            blob_store.put(variant_key, buffer.getvalue())
+        variants[name] = blob_url(variant_key)
+
+    return {"foto": blob_url(key), "variantes": variants}
+
+def photo_reference(foto: str) -> str:
+    """Fotos enviadas como data URL (base64) vão para o blob store; URLs
+    (Google, blobs já gravados) ficam como estão."""
+    if not foto.startswith("data:image"):
+        return foto
+    try:
+        data = base64.b64decode(foto.split(",", 1)[1], validate=True)
+    except (IndexError, binascii.Error) as e:
+        raise InvalidImage(f"Invalid data URL: {e}")
+    return store_user_photo(data)["foto"]
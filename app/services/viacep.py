@@ -1,5 +1,13 @@
+import os
+import time
 import requests
 from typing import Dict, Optional
+from app.services.cache import MISSING
+from app.services.cep_cache import cep_cache
+from app.services.http_client import http_client
+from app.services.shipping import shipping_engine
+
+VIACEP_URL = os.getenv("VIACEP_URL", "https://viacep.com.br/ws")
 
 class ViaCEPService:
     @staticmethod
@@ -9,42 +17,44 @@ class ViaCEPService:
         if len(cep) != 8:
             return None
         
+        cached = cep_cache.get(cep)
+        if cached is not MISSING:
+            return cached
+        
+        started = time.perf_counter()
         try:
-            response = requests.get(f"https://viacep.com.br/ws/{cep}/json/")
-            if response.status_code == 200:
-                data = response.json()
-                if "erro" not in data:
-                    return {
-                        "cep": data["cep"],
-                        "logradouro": data["logradouro"],
-                        "bairro": data["bairro"],
-                        "cidade": data["localidade"],
-                        "uf": data["uf"]
-                    }
+            response = http_client.get(f"{VIACEP_URL}/{cep}/json/")
+        except requests.RequestException:
+            cep_cache.record_upstream((time.perf_counter() - started) * 1000, error=True)
+            return None
+        cep_cache.record_upstream((time.perf_counter() - started) * 1000)
+        
+        # Só respostas definitivas vão para o cache; falhas do upstream não
+        if response.status_code == 400:
+            cep_cache.set(cep, None)
             return None
-        except:
+        if response.status_code != 200:
             return None
+        
+        # Corpo inesperado (HTML de erro, JSON incompleto) é falha do upstream: não vai para o cache
+        try:
+            data = response.json()
+            if "erro" in data:
+                cep_cache.set(cep, None)
+                return None
+            address = {
+                "cep": data["cep"],
+                "logradouro": data["logradouro"],
+                "bairro": data["bairro"],
+                "cidade": data["localidade"],
+                "uf": data["uf"]
+            }
+        except (ValueError, KeyError, TypeError):
+            return None
+        cep_cache.set(cep, address)
+        return address
     
     @staticmethod
     def calculate_shipping(cep: str, total: float) -> Dict[str, float]:
-        # Frete grátis acima de R$ 150
-        if total >= 150.0:
-            return {"frete": 0.0, "prazo": 5}
-        
-        # Simulação simples de frete por região
-        address = ViaCEPService.get_address(cep)
-        if not address:
-            return {"frete": 15.0, "prazo": 10}
-        
-        # Frete por estado (simulação)
-        frete_por_estado = {
-            "SP": 10.0, "RJ": 12.0, "MG": 15.0, "RS": 18.0,
-            "PR": 16.0, "SC": 17.0, "GO": 20.0, "DF": 18.0,
-            "BA": 22.0, "PE": 25.0, "CE": 28.0, "AM": 35.0
-        }
-        
-        uf = address["uf"]
-        frete = frete_por_estado.get(uf, 20.0)
-        prazo = 7 if uf in ["SP", "RJ", "MG"] else 10
-        
-        return {"frete": frete, "prazo": prazo}
\ No newline at end of file
+        # A UF sai da faixa do CEP, sem consultar o ViaCEP
+        return shipping_engine.quote(cep, total)
@@ -0,0 +1,195 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import func
+from app.database import IS_SQLITE, SessionLocal, engine
+from app.models.order import Order
+from app.models.webhook_inbox import WebhookInbox
+from app.services.catalog_cache import catalog_cache
+from app.services.inventory import (
+    InsufficientStock, decrement_stock, merge_lines, release_reservations, restock
+)
+from app.services.mercadopago import MercadoPagoService
+from app.services.workers import BackgroundWorker, claim_rows
+
+INBOX_BATCH_SIZE = int(os.getenv("WEBHOOK_INBOX_BATCH_SIZE", "20"))
+INBOX_POLL_INTERVAL = float(os.getenv("WEBHOOK_INBOX_POLL_INTERVAL", "2"))
+# SQLite não tem lock de linha: o "FOR UPDATE" do pedido em apply_payment é
+# ignorado e duas notificações do mesmo pagamento em workers diferentes
+# baixariam o estoque duas vezes. Lá o inbox roda com um worker só (e um só
+# processo da API com WEBHOOK_WORKER=1)
+INBOX_WORKERS = 1 if IS_SQLITE else int(os.getenv("WEBHOOK_INBOX_WORKERS", "2"))
+INBOX_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_INBOX_MAX_ATTEMPTS", "10"))
+INBOX_LEASE_SECONDS = 60
+INBOX_MAX_BACKOFF = 600
+CANCELLED_STATUSES = ("cancelled", "rejected", "refunded", "charged_back")
+
+def payment_resource_id(data: Any) -> Optional[str]:
+    """Id do pagamento da notificação; None se não for de pagamento.
+
+    Pings de teste do painel e outros tópicos não trazem ``data.id``: são
+    ignorados (respondidos com 200 para o Mercado Pago não reenviar).
+    """
+    if not isinstance(data, dict) or data.get("type") != "payment":
+        return None
+    resource = data.get("data")
+    resource_id = resource.get("id") if isinstance(resource, dict) else None
+    if resource_id is None or isinstance(resource_id, (dict, list)) or str(resource_id) == "":
+        return None
+    return str(resource_id)
+
+def dedupe_key(data: Dict[str, Any]) -> str:
+    # O Mercado Pago reenvia a mesma notificação com o mesmo "id"
+    if data.get("id") is not None:
+        return f"{data.get('type')}:{data['id']}"
+    return f"{data.get('type')}:{data['data']['id']}:{data.get('action', '')}"
+
+def insert_ignoring_duplicates(values: Dict[str, Any]):
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(WebhookInbox).values(**values).on_conflict_do_nothing(
+            index_elements=["dedupe_key"]
+        )
+    if dialect == "sqlite":
+        return sqlite.insert(WebhookInbox).values(**values).on_conflict_do_nothing(
+            index_elements=["dedupe_key"]
+        )
+    return insert(WebhookInbox).values(**values)
+
+async def ingest_notification(db, data: Dict[str, Any]) -> bool:
+    """Grava a notificação crua no inbox; devolve False se não for de pagamento"""
+    resource_id = payment_resource_id(data)
+    if resource_id is None:
+        return False
+
+    statement = insert_ignoring_duplicates({
+        "dedupe_key": dedupe_key(data),
+        "topic": "payment",
+        "resource_id": resource_id,
+        "payload": data,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": datetime.utcnow()
+    })
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except IntegrityError:
+        # Dialetos sem ON CONFLICT: a notificação já estava no inbox
+        await db.rollback()
+    return True
+
+def claim_due(db, limit: int = INBOX_BATCH_SIZE) -> Dict[str, List[int]]:
+    """Reivindica notificações vencidas, agrupadas pelo ID do pagamento"""
+    now = datetime.utcnow()
+    query = (
+        select(WebhookInbox.id, WebhookInbox.resource_id)
+        .where(
+            or_(WebhookInbox.status == "pending", WebhookInbox.status == "processing"),
+            WebhookInbox.next_attempt_at <= now
+        )
+        .order_by(WebhookInbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    resources = dict(db.execute(query).all())
+    groups: Dict[str, List[int]] = {}
+    for entry_id in claim_rows(db, WebhookInbox, resources, now, INBOX_LEASE_SECONDS):
+        groups.setdefault(resources[entry_id], []).append(entry_id)
+    return groups
+
+def apply_payment(db, payment_info: Dict[str, Any]) -> None:
+    """Aplica o status do pagamento no pedido; seguro para reprocessar"""
+    order_id = payment_info.get("external_reference")
+    if not order_id:
+        return
+
+    # Lock no pedido: duas notificações do mesmo pagamento não baixam estoque duas vezes
+    order = db.execute(
+        select(Order).where(Order.id == int(order_id)).with_for_update()
+    ).scalars().first()
+    if not order:
+        return
+
+    payment_status = payment_info.get("status")
+    if payment_status == "approved":
+        if order.status == "pending":
+            try:
+                decrement_stock(db, order.items)
+                order.status = "paid"
+            except InsufficientStock as e:
+                # Pago mas sem saldo: fica sinalizado para estorno manual
+                order.status = "stock_conflict"
+                print(f"Order {order.id}: {e}")
+            release_reservations(db, order.id)
+            invalidate_products(order.items)
+
+    elif payment_status in CANCELLED_STATUSES:
+        # Compensação: pedido já pago devolve as unidades ao estoque
+        if order.status == "paid":
+            restock(db, order.items)
+            invalidate_products(order.items)
+        release_reservations(db, order.id)
+        order.status = "cancelled"
+
+def invalidate_products(items) -> None:
+    # estoque aparece nas listagens; o cache do catálogo não pode ficar velho
+    for product_id in merge_lines(items):
+        catalog_cache.invalidate(product_id)
+
+def process_group(db, resource_id: str, entry_ids: List[int], mp_service: MercadoPagoService) -> str:
+    """Processa todas as notificações de um pagamento com uma única consulta ao MP"""
+    entries = db.execute(select(WebhookInbox).where(WebhookInbox.id.in_(entry_ids))).scalars().all()
+    try:
+        payment_info = mp_service.get_payment(resource_id)
+        apply_payment(db, payment_info or {})
+    except Exception as e:
+        db.rollback()
+        entries = db.execute(select(WebhookInbox).where(WebhookInbox.id.in_(entry_ids))).scalars().all()
+        for entry in entries:
+            entry.attempts += 1
+            entry.last_error = str(e)[:1000]
+            if entry.attempts >= INBOX_MAX_ATTEMPTS:
+                entry.status = "failed"
+            else:
+                entry.status = "pending"
+                entry.next_attempt_at = datetime.utcnow() + timedelta(
+                    seconds=min(2 ** entry.attempts, INBOX_MAX_BACKOFF)
+                )
+        db.commit()
+        return "retry"
+
+    for entry in entries:
+        entry.status = "done"
+        entry.attempts += 1
+        entry.last_error = None
+        entry.processed_at = func.now()
+    db.commit()
+    return "done"
+
+def drain_once(limit: int = INBOX_BATCH_SIZE) -> int:
+    db = SessionLocal()
+    try:
+        groups = claim_due(db, limit)
+        if not groups:
+            return 0
+        mp_service = MercadoPagoService()
+        for resource_id, entry_ids in groups.items():
+            process_group(db, resource_id, entry_ids, mp_service)
+        return sum(len(entry_ids) for entry_ids in groups.values())
+    finally:
+        db.close()
+
+webhook_worker = BackgroundWorker(
+    "Webhook inbox", drain_once, INBOX_BATCH_SIZE, INBOX_POLL_INTERVAL, concurrency=INBOX_WORKERS
+)
+
+if __name__ == "__main__":
+    # Worker dedicado: python -m app.services.webhook_inbox
+    import time
+    while True:
+        if drain_once() < INBOX_BATCH_SIZE:
+            time.sleep(INBOX_POLL_INTERVAL)
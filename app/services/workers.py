@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List
+from sqlalchemy import or_, update
+from starlette.concurrency import run_in_threadpool
+
+class BackgroundWorker:
+    """Pool de tasks asyncio que drenam uma fila persistida no banco.
+
+    ``drain`` é uma função síncrona que processa um lote e devolve quantos
+    itens tratou; ela roda no threadpool. Com ``concurrency > 1`` várias
+    tasks drenam em paralelo (a função deve reivindicar itens com
+    ``claim_rows``). ``notify`` acorda as tasks sem esperar o próximo poll.
+    """
+
+    def __init__(self, name: str, drain: Callable[[], int], batch_size: int,
+                 poll_interval: float, concurrency: int = 1):
+        self.name = name
+        self.drain = drain
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = None
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await run_in_threadpool(self.drain)
+            except Exception as e:
+                print(f"{self.name} worker error: {e}")
+                processed = 0
+
+            # Lote cheio: provavelmente há mais trabalho, segue sem esperar
+            if processed >= self.batch_size:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+def claim_rows(db, model, candidate_ids: Iterable[int], now: datetime, lease_seconds: float) -> List[int]:
+    """Troca o lease de cada candidata com um UPDATE condicional (compare-and-set).
+
+    Só fica com a linha quem a encontrou ainda vencida; quem chegou depois
+    recebe rowcount 0. No Postgres o ``SKIP LOCKED`` da seleção já separa
+    os workers; no SQLite (sem lock de linha, escritas serializadas) é este
+    UPDATE que impede dois workers de pegarem a mesma entrada. Faz commit.
+    """
+    lease = now + timedelta(seconds=lease_seconds)
+    claimed = []
+    for row_id in candidate_ids:
+        result = db.execute(
+            update(model)
+            .where(
+                model.id == row_id,
+                or_(model.status == "pending", model.status == "processing"),
+                model.next_attempt_at <= now
+            )
+            .values(status="processing", next_attempt_at=lease)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            claimed.append(row_id)
+    db.commit()
+    return claimed
+
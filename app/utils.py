@@ -1,18 +1,60 @@
+import orjson
+from typing import Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 
-def success_response(data=None, message="Success"):
-    return JSONResponse(content={
+def _fallback(obj):
+    # Objetos ORM e tipos que o orjson não conhece: caminho lento do FastAPI
+    return jsonable_encoder(obj)
+
+class ORJSONResponse(JSONResponse):
+    """JSON via orjson; dataclasses de app.schemas, dicts e datetimes saem
+    direto e só o que o orjson não conhece passa pelo jsonable_encoder."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_fallback, option=orjson.OPT_NON_STR_KEYS)
+
+def success_response(data=None, message="Success", **extra):
+    return ORJSONResponse(content={
         "success": True,
         "data": data,
-        "message": message
+        "message": message,
+        **extra
     })
 
 def error_response(message="Error", status_code=400):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status_code,
         content={
             "success": False,
             "data": None,
             "message": message
         }
-    )
\ No newline at end of file
+    )
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): ignora o prefixo W/"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+def cache_headers(response: Response, etag: str, cache_control: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
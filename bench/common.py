@@ -0,0 +1,44 @@
+"""Ambiente dos benchmarks: banco SQLite descartável e workers desligados.
+
+Importe ``setup`` antes de qualquer módulo de ``app`` (o app lê o ambiente
+na importação). ``BENCH_DATABASE_URL`` aponta para um Postgres de teste.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def setup(**env: str) -> str:
+    workdir = tempfile.mkdtemp(prefix="mks-bench-")
+    os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+    os.environ.setdefault("DB_MODE", "sync")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+    os.environ["BLOB_STORE_PATH"] = os.path.join(workdir, "blobs")
+    for worker in ("PAYMENT_DISPATCHER", "WEBHOOK_WORKER", "RESERVATION_SWEEPER"):
+        os.environ[worker] = "0"
+    os.environ.update(env)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from app.database import Base, engine
+    import app.main  # noqa: F401 (registra todos os modelos)
+    Base.metadata.create_all(bind=engine)
+    return workdir
+
+def timed(fn: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    """Mediana e melhor tempo (ms) de ``repeat`` chamadas"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "best_ms": min(samples)}
+
+def report(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(title)
+    for name, values in rows.items():
+        print(f"  {name:<32}" + "  ".join(f"{key}={value:,.2f}" for key, value in values.items()))
@@ -0,0 +1,112 @@
+"""Vazão do pipeline de imagens do provador virtual.
+
+    python -m bench.image_pipeline [--corpus DIR] [--images 24] [--workers 2]
+
+Sem ``--corpus`` gera fotos sintéticas de celular (4032x3024, JPEG e PNG).
+Compara, por imagem e em imagens/s:
+
+- ``legacy``: o caminho antigo (open + thumbnail LANCZOS + encode, sem
+  ``draft``), no event loop;
+- ``draft``: ``resize_to_jpeg`` no próprio processo;
+- ``pool``: ``image_pipeline`` com ``--workers`` processos.
+
+``loop_stall_ms`` é o maior atraso de um tick de 10 ms do event loop
+enquanto as imagens são processadas.
+"""
+import argparse
+import asyncio
+import io
+import os
+import time
+from bench.common import setup
+
+def synthetic_corpus(count: int):
+    from PIL import Image
+    images = []
+    for index in range(count):
+        image = Image.merge("RGB", [
+            Image.linear_gradient("L").resize((4032, 3024)),
+            Image.effect_noise((4032, 3024), 40 + index),
+            Image.linear_gradient("L").rotate(90).resize((4032, 3024)),
+        ])
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG" if index % 4 == 3 else "JPEG", quality=92)
+        images.append(buffer.getvalue())
+    return images
+
+def load_corpus(path: str):
+    return [
+        open(os.path.join(path, name), "rb").read()
+        for name in sorted(os.listdir(path))
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    ]
+
+def legacy_resize(data: bytes) -> bytes:
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+async def measure(images, process) -> dict:
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal stall
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stall = max(stall, (time.perf_counter() - start) * 1000 - 10)
+
+    ticker = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await process(images)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    return {"images_per_s": len(images) / elapsed, "ms_per_image": elapsed * 1000 / len(images), "loop_stall_ms": stall}
+
+async def main_async(images, workers: int) -> None:
+    from app.services.image_pipeline import ImagePipeline, resize_to_jpeg
+
+    async def legacy(batch):
+        for data in batch:
+            legacy_resize(data)
+
+    async def draft(batch):
+        for data in batch:
+            resize_to_jpeg(data)
+
+    pipeline = ImagePipeline(workers=workers, max_pending=len(images))
+    # Sobe os processos antes de medir (o primeiro uso paga o fork)
+    await pipeline.resize_to_jpeg(images[0])
+
+    async def pool(batch):
+        await asyncio.gather(*(pipeline.resize_to_jpeg(data) for data in batch))
+
+    try:
+        for name, process in (("legacy", legacy), ("draft", draft), (f"pool x{workers}", pool)):
+            result = await measure(images, process)
+            print(f"  {name:<10}" + "  ".join(f"{key}={value:,.1f}" for key, value in result.items()))
+    finally:
+        pipeline.shutdown()
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus")
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    setup()
+
+    images = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.images)
+    print(f"{len(images)} imagens, {sum(map(len, images)) / len(images) / 1024 / 1024:.1f} MB em média")
+    asyncio.run(main_async(images, args.workers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Latência do catálogo durante uma rajada de logins.
+
+    python -m bench.login_storm [--logins 200] [--rounds 10]
+
+Três cenários, com as mesmas requisições de catálogo (cache desligado,
+então cada uma passa pelo threadpool do Starlette):
+
+- ``idle``: sem logins;
+- ``threadpool``: bcrypt no threadpool do Starlette, como antes do
+  PasswordHasher;
+- ``hasher``: ``POST /api/auth/login`` de verdade, com o executor próprio
+  e o 503 de backpressure.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from bench.common import setup
+
+async def catalog_latencies(client, stop: asyncio.Event):
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/produtos/?limit=20")
+        assert response.status_code == 200
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def scenario(client, storm) -> dict:
+    stop = asyncio.Event()
+    reader = asyncio.create_task(catalog_latencies(client, stop))
+    await asyncio.sleep(0.2)  # linha de base antes da rajada
+    started = time.perf_counter()
+    statuses = await storm()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    samples = await reader
+    quantiles = statistics.quantiles(samples, n=20)
+    return {
+        "catalog_p50_ms": statistics.median(samples),
+        "catalog_p95_ms": quantiles[18],
+        "catalog_max_ms": max(samples),
+        "catalog_requests": len(samples),
+        "logins_ok": statuses.count(200),
+        "logins_503": statuses.count(503),
+        "storm_s": elapsed,
+    }
+
+async def main_async(args) -> None:
+    import httpx
+    from starlette.concurrency import run_in_threadpool
+    from app.auth import get_password_hash, pwd_context
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models.product import Product
+    from app.models.user import User
+
+    db = SessionLocal()
+    db.add_all(Product(nome=f"Produto {i}", preco=10.0, categoria="Feminina", estoque=5, is_active=True) for i in range(50))
+    hashed = get_password_hash("segredo123")
+    db.add(User(email="bench@example.com", nome="Bench", hashed_password=hashed, role="user", is_active=True))
+    db.commit()
+    db.close()
+
+    credentials = {"email": "bench@example.com", "password": "segredo123"}
+
+    async def idle():
+        await asyncio.sleep(args.idle_seconds)
+        return []
+
+    async def threadpool_storm():
+        async def verify():
+            await run_in_threadpool(pwd_context.verify, "segredo123", hashed)
+            return 200
+        return await asyncio.gather(*(verify() for _ in range(args.logins)))
+
+    async def hasher_storm():
+        async def login():
+            return (await client.post("/api/auth/login", json=credentials)).status_code
+        return await asyncio.gather(*(login() for _ in range(args.logins)))
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for name, storm in (("idle", idle), ("threadpool", threadpool_storm), ("hasher", hasher_storm)):
+                result = await scenario(client, storm)
+                print(f"{name:<11}" + "  ".join(
+                    f"{key}={value:,.1f}" if isinstance(value, float) else f"{key}={value}"
+                    for key, value in result.items()
+                ))
+    finally:
+        await app.router.shutdown()
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_ROUNDS")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    setup(BCRYPT_ROUNDS=str(args.rounds), CATALOG_CACHE_TTL="0")
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
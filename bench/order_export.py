@@ -0,0 +1,62 @@
+"""Export de pedidos em streaming: memória de pico e linhas/s.
+
+    python -m bench.order_export [--rows 1000000] [--formato csv]
+
+Gera ``--rows`` linhas sintéticas (pedidos de 2 itens) e consome o gerador
+do export como o StreamingResponse faz, sem guardar o arquivo. O pico do
+tracemalloc tem que ficar estável quando ``--rows`` cresce: é o que mostra
+que o export não materializa o resultado.
+"""
+import argparse
+import time
+import tracemalloc
+from bench.common import setup
+
+SEED_BATCH = 10000
+ITEMS = [
+    {"product_id": 1, "nome": "Vestido", "preco": 129.9, "quantidade": 1, "subtotal": 129.9},
+    {"product_id": 2, "nome": "Batom", "preco": 39.9, "quantidade": 2, "subtotal": 79.8},
+]
+ENDERECO = {"cep": "01001000", "logradouro": "Praça da Sé", "numero": "1", "bairro": "Sé", "cidade": "São Paulo", "uf": "SP"}
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formato", choices=("csv", "ndjson"), default="csv")
+    args = parser.parse_args()
+    setup()
+
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app.models.order import Order
+    from app.models.user import User
+    from app.services.order_export import export_statement, iter_export
+
+    orders = args.rows // len(ITEMS)
+    db = SessionLocal()
+    user = User(email="cliente@example.com", nome="Cliente")
+    db.add(user)
+    db.commit()
+    for start in range(0, orders, SEED_BATCH):
+        db.execute(insert(Order), [
+            {"user_id": user.id, "total": 209.7, "status": "paid", "endereco": ENDERECO, "items": ITEMS}
+            for _ in range(min(SEED_BATCH, orders - start))
+        ])
+        db.commit()
+    db.close()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    for chunk in iter_export(args.formato, export_statement()):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rows = orders * len(ITEMS)
+    print(f"  {args.formato:<8}rows={rows:>10,}  bytes={size:>14,}  peak_mb={peak / 2**20:>6.1f}  "
+          f"rows_per_s={rows / elapsed:>10,.0f}")
+
+if __name__ == "__main__":
+    main()
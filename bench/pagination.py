@@ -0,0 +1,50 @@
+"""OFFSET x cursor (keyset) na listagem de produtos.
+
+    python -m bench.pagination [--rows 50000] [--limit 50]
+
+Mede uma página em profundidades crescentes. Com OFFSET o banco percorre
+e descarta todas as linhas anteriores; com o cursor o custo fica constante.
+"""
+import argparse
+from bench.common import report, setup, timed
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    setup()
+
+    from sqlalchemy import insert, select
+    from app.database import SessionLocal
+    from app.models.product import Product
+    from app.pagination import apply_keyset, encode_cursor
+
+    db = SessionLocal()
+    db.execute(insert(Product), [
+        {"nome": f"Produto {index}", "preco": 10.0, "categoria": "Feminina", "estoque": 5, "is_active": True}
+        for index in range(args.rows)
+    ])
+    db.commit()
+
+    base = select(Product).where(Product.is_active == True)
+    ordered = base.order_by(Product.created_at, Product.id)
+    keys = db.execute(select(Product.created_at, Product.id).order_by(Product.created_at, Product.id)).all()
+
+    rows = {}
+    for depth in (0, args.rows // 2, args.rows - args.limit):
+        by_offset = ordered.offset(depth).limit(args.limit + 1)
+        cursor = encode_cursor(*keys[depth - 1]) if depth else None
+        by_cursor = apply_keyset(base, cursor, Product.created_at, Product.id).limit(args.limit + 1)
+
+        offset_page = db.execute(by_offset).scalars().all()
+        cursor_page = db.execute(by_cursor).scalars().all()
+        assert [p.id for p in offset_page] == [p.id for p in cursor_page]
+
+        rows[f"offset depth={depth}"] = timed(lambda: db.execute(by_offset).scalars().all())
+        rows[f"cursor depth={depth}"] = timed(lambda: db.execute(by_cursor).scalars().all())
+        db.expunge_all()
+    report(f"Página de {args.limit} produtos em {args.rows:,} linhas", rows)
+
+if __name__ == "__main__":
+    main()
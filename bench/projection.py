@@ -0,0 +1,55 @@
+"""fields= e load_only nas listagens: bytes por resposta e linhas/s.
+
+    python -m bench.projection [--rows 200] [--repeat 20]
+
+Produtos com descrição longa e imagem em data URL (o pior caso do
+catálogo atual). Cada cenário faz ``--repeat`` requisições de uma página
+com todas as linhas, com o cache do catálogo desligado.
+"""
+import argparse
+import time
+from bench.common import setup
+
+SCENARIOS = {
+    "completo": "",
+    "card": "id,nome,preco,preco_promocional,promocao,categoria,estoque,imagens,imagens_webp",
+    "fields=id,nome,preco": "id,nome,preco",
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    setup(CATALOG_CACHE_TTL="0")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models.product import Product
+
+    db = SessionLocal()
+    db.execute(insert(Product), [
+        {
+            "nome": f"Vestido {index}", "descricao": "Tecido leve e forrado. " * 100, "preco": 129.9,
+            "categoria": "Feminina", "estoque": 5, "is_active": True,
+            "imagens": ["data:image/jpeg;base64," + "A" * 20000],
+        }
+        for index in range(args.rows)
+    ])
+    db.commit()
+    db.close()
+
+    with TestClient(app) as client:
+        for name, fields in SCENARIOS.items():
+            url = f"/api/produtos/?limit={args.rows}" + (f"&fields={fields}" if fields else "")
+            size = len(client.get(url).content)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                assert client.get(url).status_code == 200
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<22}bytes={size:>12,}  rows_per_s={args.rows * args.repeat / elapsed:>10,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Serialização de uma página de 50 produtos: antes x depois do orjson.
+
+    python -m bench.serialization [--products 50] [--repeat 200]
+
+``legacy`` reproduz o success_response antigo (jsonable_encoder sobre os
+objetos ORM + json da stdlib no JSONResponse). ``schemas`` monta os
+``ProductOut`` e serializa com o ORJSONResponse; ``schemas_cached`` é o
+acerto do catalog_cache, em que os ``ProductOut`` já estão prontos.
+"""
+import argparse
+from datetime import datetime
+from bench.common import report, setup, timed
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    setup()
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.models.product import Product
+    from app.schemas import ProductOut
+    from app.utils import success_response
+
+    now = datetime.utcnow()
+    products = [
+        Product(
+            id=index, nome=f"Vestido {index}", descricao="Tecido leve, forro e alças reguláveis. " * 5,
+            preco=129.9, imagens=[f"https://cdn.example.com/{index}-{n}.jpg" for n in range(3)],
+            categoria="Feminina", promocao=index % 3 == 0, preco_promocional=99.9 if index % 3 == 0 else None,
+            estoque=5, sku=f"SKU-{index}", is_active=True, created_at=now, updated_at=now
+        )
+        for index in range(args.products)
+    ]
+    cached = [ProductOut.from_orm(p) for p in products]
+
+    def legacy():
+        return JSONResponse(content={
+            "success": True, "data": jsonable_encoder(products), "message": "Produtos listados com sucesso"
+        }).body
+
+    def schemas():
+        return success_response(data=[ProductOut.from_orm(p) for p in products], message="Produtos listados com sucesso").body
+
+    def schemas_cached():
+        return success_response(data=cached, message="Produtos listados com sucesso").body
+
+    rows = {}
+    for fn in (legacy, schemas, schemas_cached):
+        rows[fn.__name__] = dict(timed(fn, args.repeat), kbytes=len(fn()) / 1024)
+    report(f"Página de {args.products} produtos ({args.repeat} repetições)", rows)
+
+if __name__ == "__main__":
+    main()
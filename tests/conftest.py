@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Banco descartável: nunca roda contra a DATABASE_URL do .env.
+# TEST_DATABASE_URL aponta a suíte para um Postgres de teste; DB_MODE=async
+# roda os mesmos testes pelo AsyncSession.
+_tmp = tempfile.mkdtemp(prefix="mks-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("DB_MODE", "sync")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["BLOB_STORE_PATH"] = os.path.join(_tmp, "blobs")
+for _worker in ("PAYMENT_DISPATCHER", "WEBHOOK_WORKER", "RESERVATION_SWEEPER"):
+    os.environ[_worker] = "0"
+
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth import create_access_token
+from app.database import Base, SessionLocal, async_engine, engine
+from app.models.product import Product
+from app.models.user import User
+from app.services.catalog_cache import catalog_cache
+from app.services.cep_cache import cep_cache
+from app.services.user_cache import user_cache
+
+# O app não cria tabelas; a suíte usa o schema dos modelos (as migrações têm
+# o próprio teste em test_migrations.py)
+Base.metadata.create_all(bind=engine)
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            # O contador do catálogo é uma linha fixa (seed do create_all)
+            if table.name != "catalog_version":
+                conn.execute(table.delete())
+    catalog_cache.invalidate()
+    user_cache.principals.clear()
+    cep_cache.memory.clear()
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@contextmanager
+def count_queries():
+    """Lista os statements que passam pelos engines (qualquer thread) no bloco"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield executed
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+@contextmanager
+def count_checkouts():
+    """Conexões do pool no bloco: ``stats["open"]`` (agora), ``"total"`` (empréstimos)"""
+    stats = {"open": 0, "total": 0}
+
+    def checkout(*args):
+        stats["open"] += 1
+        stats["total"] += 1
+
+    def checkin(*args):
+        stats["open"] -= 1
+
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    for target in engines:
+        event.listen(target, "checkout", checkout)
+        event.listen(target, "checkin", checkin)
+    try:
+        yield stats
+    finally:
+        for target in engines:
+            event.remove(target, "checkout", checkout)
+            event.remove(target, "checkin", checkin)
+
+def make_user(db, email="cliente@example.com", role="user", **values) -> User:
+    user = User(email=email, nome=values.pop("nome", "Cliente"), role=role, **values)
+    db.add(user)
+    db.commit()
+    return user
+
+def auth_headers(user: User):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email, 'user_id': user.id, 'role': user.role})}"}
+
+def make_product(db, **values) -> Product:
+    values = {"nome": "Vestido", "preco": 100.0, "categoria": "Feminina", "estoque": 10, "is_active": True, **values}
+    product = Product(**values)
+    db.add(product)
+    db.commit()
+    return product
+
+@pytest.fixture
+def user(db):
+    return make_user(db)
+
+@pytest.fixture
+def user_headers(user):
+    return auth_headers(user)
+
+@pytest.fixture
+def admin_headers(db):
+    return auth_headers(make_user(db, email="admin@example.com", role="admin", nome="Admin"))
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o upstream real
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.connections.add(self.client_address)
+        status, body, delay = server.routes.get(self.path, (404, "", 0))
+        time.sleep(delay)
+        self.send_response(status)
+        if callable(body):
+            # Corpo em chunks, sem Content-Length; conta o que chegou a sair
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for chunk in body():
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    server.sent += len(chunk)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            return
+        payload = body if isinstance(body, bytes) else (body if isinstance(body, str) else json.dumps(body)).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    """Servidor HTTP local: ``stub.routes[path] = (status, corpo, atraso)``.
+
+    O corpo é JSON (dict/list), texto, bytes ou uma função que gera chunks.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.routes, server.connections, server.requests, server.sent = {}, set(), 0, 0
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.host = f"127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,36 @@
+from app.auth import create_access_token
+from app.models.user import User
+from app.services.cache import MISSING
+from app.services.user_cache import UserPrincipal, user_cache
+from tests.conftest import count_checkouts
+
+def test_deactivated_user_is_rejected_after_being_cached(client, db, user, user_headers):
+    assert client.get("/api/auth/me", headers=user_headers).status_code == 200
+    assert user_cache.get(user.id, user.email) is not MISSING
+
+    db.get(User, user.id).is_active = False
+    db.commit()
+    response = client.get("/api/auth/me", headers=user_headers)
+    assert response.status_code == 401
+
+def test_inactive_cached_principal_is_rejected(client, user, user_headers):
+    # Entrada vinda do cache (desativado em outro processo antes do TTL vencer)
+    user_cache.set(user.id, user.email, UserPrincipal(user.id, user.email, user.role, False))
+    assert client.get("/api/auth/me", headers=user_headers).status_code == 401
+
+def test_email_change_drops_the_entry_under_the_old_email(client, db, user):
+    # Token antigo, sem user_id: o cache é indexado pelo email
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    old_email = user.email
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    db.get(User, user.id).email = "novo@example.com"
+    db.commit()
+    assert user_cache.get(None, old_email) is MISSING
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+def test_authenticated_route_uses_one_connection_on_a_cache_miss(client, user, user_headers):
+    # A autenticação e o handler dividem a sessão (e a conexão) do request
+    with count_checkouts() as stats:
+        assert client.get("/api/carrinho/", headers=user_headers).status_code == 200
+    assert stats["total"] == 1
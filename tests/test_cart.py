@@ -0,0 +1,30 @@
+import pytest
+from app.models.cart import CartItem
+from tests.conftest import make_product
+
+def cart_lines(db, user):
+    db.expire_all()
+    return {item.product_id: item.quantidade for item in db.query(CartItem).filter_by(user_id=user.id)}
+
+def test_bulk_operations_apply_in_order(client, db, user, user_headers):
+    vestido, batom = make_product(db), make_product(db, nome="Batom")
+    response = client.patch("/api/carrinho/bulk", headers=user_headers, json={"operacoes": [
+        {"op": "add", "produto_id": vestido.id, "quantidade": 2},
+        {"op": "add", "produto_id": batom.id, "quantidade": 1},
+        {"op": "set", "produto_id": vestido.id, "quantidade": 5},
+        {"op": "remove", "produto_id": batom.id},
+    ]})
+    assert response.status_code == 200
+    assert cart_lines(db, user) == {vestido.id: 5}
+
+@pytest.mark.parametrize("op", ["add", "set"])
+def test_bulk_operation_without_quantity_is_rejected(client, db, user, user_headers, op):
+    product = make_product(db)
+    response = client.patch("/api/carrinho/bulk", headers=user_headers, json={"operacoes": [
+        {"op": "add", "produto_id": product.id, "quantidade": 3},
+        {"op": op, "produto_id": product.id},
+    ]})
+    assert response.status_code == 400
+    assert "Operação 1" in response.json()["message"]
+    # Nada do lote fica gravado
+    assert cart_lines(db, user) == {}
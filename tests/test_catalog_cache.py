@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from sqlalchemy import select, update
+from app.database import SessionLocal, SyncSessionAdapter
+from app.models.catalog_version import CatalogVersion
+from app.models.product import Product
+from app.services.catalog_cache import CatalogCache, catalog_cache
+from app.services.inventory import decrement_stock, restock
+from tests.conftest import count_queries, make_product
+
+def stored_version(db):
+    return db.execute(select(CatalogVersion.version)).scalar()
+
+def test_etag_is_the_same_in_every_worker(db):
+    make_product(db)
+
+    async def etag_of(worker):
+        adapter = SyncSessionAdapter(SessionLocal())
+        try:
+            return worker.etag(await worker.current_version(adapter))
+        finally:
+            adapter.sync_session.close()
+
+    assert asyncio.run(etag_of(CatalogCache())) == asyncio.run(etag_of(CatalogCache()))
+
+def test_write_from_another_worker_ends_revalidation(client, db, monkeypatch):
+    # Sem a janela da versão em memória: cada request relê o contador
+    monkeypatch.setattr(catalog_cache, "version_ttl", 0)
+    product = make_product(db, preco=100.0)
+    first = client.get("/api/produtos/")
+    etag = first.headers["ETag"]
+    assert client.get("/api/produtos/", headers={"If-None-Match": etag}).status_code == 304
+
+    # Escrita fora deste processo: nada chama catalog_cache.invalidate aqui
+    db.execute(update(Product).where(Product.id == product.id).values(preco=80.0))
+    db.commit()
+
+    response = client.get("/api/produtos/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["data"][0]["preco"] == 80.0
+
+def test_conditional_request_within_the_version_ttl_skips_the_database(client, db):
+    make_product(db)
+    etag = client.get("/api/produtos/").headers["ETag"]
+
+    with count_queries() as executed:
+        response = client.get("/api/produtos/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert executed == []
+
+def test_stock_changes_do_not_bump_the_catalog_version(db):
+    product = make_product(db, estoque=3)
+    version = stored_version(db)
+
+    # Cada venda/devolução: não pode travar nem derrubar o catálogo
+    decrement_stock(db, [{"product_id": product.id, "quantidade": 1}])
+    restock(db, [{"product_id": product.id, "quantidade": 1}])
+    db.commit()
+    assert stored_version(db) == version
+
+    db.execute(update(Product).where(Product.id == product.id).values(preco=80.0))
+    db.commit()
+    assert stored_version(db) == version + 1
+
+@pytest.mark.parametrize("path", ["/api/produtos/", "/api/products/"])
+def test_invalid_fields_are_rejected_before_the_304(client, db, path):
+    make_product(db)
+    etag = client.get(path).headers["ETag"]
+
+    response = client.get(f"{path}?fields=id,senha", headers={"If-None-Match": etag})
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from sqlalchemy import event, select
+from app.database import SessionLocal, SyncSessionAdapter, engine
+from app.models.user import User
+
+def statements_on_current_thread():
+    """Conta os statements executados na thread que chamou (o "event loop")"""
+    thread = threading.get_ident()
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    return executed, lambda: event.remove(engine, "before_cursor_execute", record)
+
+def test_register_and_login_in_sync_mode(client):
+    # SQLite sem check_same_thread: cada passo do adapter cai numa thread do pool
+    response = client.post("/api/auth/register", json={"email": "nova@example.com", "password": "segredo123", "nome": "Nova"})
+    assert response.status_code == 200
+    assert response.json()["data"]["user"]["email"] == "nova@example.com"
+
+    response = client.post("/api/auth/login", json={"email": "nova@example.com", "password": "segredo123"})
+    assert response.status_code == 200
+
+def test_adapter_results_are_buffered_in_the_threadpool(db, user):
+    adapter = SyncSessionAdapter(SessionLocal())
+
+    async def scenario():
+        result = await adapter.execute(select(User).where(User.id == user.id))
+        executed, stop = statements_on_current_thread()
+        try:
+            # A conexão já foi devolvida: iterar não pode voltar ao cursor
+            adapter.sync_session.close()
+            users = result.scalars().all()
+        finally:
+            stop()
+        return users, executed
+
+    users, executed = asyncio.run(scenario())
+    assert [found.email for found in users] == [user.email]
+    assert executed == []
+
+def test_attributes_stay_loaded_after_commit(user):
+    adapter = SyncSessionAdapter(SessionLocal())
+
+    async def scenario():
+        loaded = await adapter.get(User, user.id)
+        loaded.nome = "Outro"
+        await adapter.commit()
+        executed, stop = statements_on_current_thread()
+        try:
+            return loaded.nome, loaded.email, executed
+        finally:
+            stop()
+            adapter.sync_session.close()
+
+    nome, email, executed = asyncio.run(scenario())
+    assert (nome, email) == ("Outro", user.email)
+    assert executed == []
@@ -0,0 +1,98 @@
+import threading
+import time
+import pytest
+import requests
+from mercadopago.errors.exceptions import MPServerError
+from app.services import viacep
+from app.services.http_client import CircuitOpenError, OutboundHTTPClient, UpstreamBusyError
+from app.services.mercadopago import PooledHttpClient
+from app.services.viacep import ViaCEPService
+
+def test_calls_reuse_the_pooled_connection(stub):
+    stub.routes["/ok"] = (200, {"ok": True}, 0)
+    client = OutboundHTTPClient()
+
+    for _ in range(5):
+        assert client.get(f"{stub.url}/ok").json() == {"ok": True}
+    assert stub.requests == 5
+    assert len(stub.connections) == 1
+
+def test_read_timeout_counts_as_failure(stub):
+    stub.routes["/slow"] = (200, {}, 0.5)
+    client = OutboundHTTPClient()
+    client.configure(stub.host, timeout=(1.0, 0.1))
+
+    with pytest.raises(requests.Timeout):
+        client.get(f"{stub.url}/slow")
+    assert client.stats()[stub.host]["failures"] == 1
+
+def test_breaker_opens_on_5xx_and_recovers_with_one_trial(stub):
+    stub.routes["/flaky"] = (503, {}, 0)
+    client = OutboundHTTPClient()
+    client.configure(stub.host, failure_threshold=3, reset_timeout=0.2)
+
+    for _ in range(3):
+        assert client.get(f"{stub.url}/flaky").status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.get(f"{stub.url}/flaky")
+    assert stub.requests == 3  # Aberto: a chamada nem sai
+
+    time.sleep(0.25)
+    stub.routes["/flaky"] = (200, {}, 0)
+    assert client.get(f"{stub.url}/flaky").status_code == 200
+    assert client.stats()[stub.host]["state"] == "closed"
+
+def test_concurrency_limit_rejects_and_frees_the_half_open_trial(stub):
+    stub.routes["/slow"] = (200, {}, 0.3)
+    client = OutboundHTTPClient()
+    policy = client.configure(stub.host, max_concurrency=1, acquire_timeout=0.05, failure_threshold=1, reset_timeout=0)
+
+    slow = threading.Thread(target=client.get, args=(f"{stub.url}/slow",))
+    slow.start()
+    time.sleep(0.1)
+    # Meio-aberto (reset_timeout=0) e sem vaga: a vaga de teste volta para o breaker
+    policy.breaker.record_failure()
+    with pytest.raises(UpstreamBusyError):
+        client.get(f"{stub.url}/slow")
+    assert policy.breaker.trial_in_flight is False
+    slow.join()
+
+@pytest.fixture
+def viacep_stub(stub, monkeypatch):
+    monkeypatch.setattr(viacep, "VIACEP_URL", stub.url)
+    return stub
+
+def test_mercadopago_transport_parses_json_and_wraps_invalid_bodies(stub):
+    stub.routes["/v1/payments/1"] = (200, {"id": 1, "status": "approved"}, 0)
+    stub.routes["/v1/payments/2"] = (502, "<html>Bad Gateway</html>", 0)
+    transport = PooledHttpClient()
+
+    assert transport.request("GET", f"{stub.url}/v1/payments/1") == {"status": 200, "response": {"id": 1, "status": "approved"}}
+    # Corpo que não é JSON: o mesmo erro do transporte padrão do SDK
+    with pytest.raises(MPServerError):
+        transport.request("GET", f"{stub.url}/v1/payments/2")
+
+def test_viacep_address_is_parsed_and_cached(viacep_stub):
+    viacep_stub.routes["/01001000/json/"] = (200, {
+        "cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé", "localidade": "São Paulo", "uf": "SP"
+    }, 0)
+
+    address = ViaCEPService.get_address("01001-000")
+    assert address == {"cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé", "cidade": "São Paulo", "uf": "SP"}
+    assert ViaCEPService.get_address("01001000") == address
+    assert viacep_stub.requests == 1
+
+@pytest.mark.parametrize("body", ["<html>Bad gateway</html>", {"cep": "01001-000", "uf": "SP"}, ["01001-000"]])
+def test_viacep_unexpected_body_returns_none_without_caching(viacep_stub, body):
+    viacep_stub.routes["/01001000/json/"] = (200, body, 0)
+
+    assert ViaCEPService.get_address("01001000") is None
+    assert ViaCEPService.get_address("01001000") is None
+    assert viacep_stub.requests == 2
+
+def test_viacep_unknown_cep_is_cached_as_none(viacep_stub):
+    viacep_stub.routes["/99999999/json/"] = (200, {"erro": True}, 0)
+
+    assert ViaCEPService.get_address("99999999") is None
+    assert ViaCEPService.get_address("99999999") is None
+    assert viacep_stub.requests == 1
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.product import Product
+from app.services.inventory import InsufficientStock, decrement_stock, reserve_stock
+from tests.conftest import make_product
+
+BUYERS = 8
+
+def race(attempt):
+    """Roda ``attempt(db)`` em BUYERS threads ao mesmo tempo; devolve quantas conseguiram"""
+    barrier = threading.Barrier(BUYERS)
+
+    def buy(_):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            attempt(db)
+            db.commit()
+            return True
+        except InsufficientStock:
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(BUYERS) as pool:
+        return sum(pool.map(buy, range(BUYERS)))
+
+def test_parallel_reservations_for_the_last_unit(db, user):
+    product = make_product(db, estoque=1)
+    items = [{"product_id": product.id, "quantidade": 1}]
+
+    def checkout(session):
+        # Como no checkout: o pedido entra na mesma transação da reserva
+        order = Order(user_id=user.id, items=items, endereco={}, total=100.0)
+        session.add(order)
+        reserve_stock(session, order)
+
+    assert race(checkout) == 1
+    db.expire_all()
+    stored = db.get(Product, product.id)
+    assert stored.estoque == 1
+    assert stored.disponivel == 0
+
+def test_parallel_decrements_never_oversell(db):
+    product = make_product(db, estoque=1)
+    items = [{"product_id": product.id, "quantidade": 1}]
+
+    assert race(lambda session: decrement_stock(session, items)) == 1
+    db.expire_all()
+    assert db.get(Product, product.id).estoque == 0
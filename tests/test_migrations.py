@@ -0,0 +1,77 @@
+import os
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from app.database import Base
+from app.models.catalog_version import CatalogVersion
+from app.models.cep_cache import CepCache
+from app.models.outbox import PaymentOutbox
+from app.models.product_image import ProductImage
+from app.models.reservation import StockReservation
+from app.models.webhook_inbox import WebhookInbox
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def migrated(tmp_path, monkeypatch):
+    """Banco SQLite próprio para as migrações: ``(config, engine)``"""
+    url = f"sqlite:///{tmp_path}/migrations.db"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    engine = create_engine(url)
+    yield config, engine
+    engine.dispose()
+
+def test_upgrade_head_matches_the_models(migrated):
+    config, engine = migrated
+    command.upgrade(config, "head")
+    command.check(config)  # Levanta se o schema divergir dos modelos
+
+    command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    command.upgrade(config, "head")
+
+def test_pre_series_database_is_stamped_at_the_baseline(migrated):
+    config, engine = migrated
+    # Schema e dados como o create_all antigo deixava (CURRENT_TIMESTAMP do SQLite)
+    command.upgrade(config, "0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text(
+            "INSERT INTO products (nome, preco, categoria, estoque, is_active, created_at) "
+            "VALUES ('Vestido', 100, 'Feminina', 5, 1, '2026-01-01 12:00:00')"
+        ))
+
+    command.stamp(config, "0001")
+    command.upgrade(config, "head")
+    command.check(config)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT created_at FROM products")).scalar() == "2026-01-01 12:00:00.000000"
+        assert conn.execute(text("SELECT version FROM catalog_version")).scalar() == 0
+
+# Tabelas que o create_all do startup criou em deploys da série anteriores às migrações
+INTERMEDIATE_DEPLOYS = {
+    "outbox": [CepCache, PaymentOutbox],
+    "catalog_version": [CepCache, PaymentOutbox, WebhookInbox, StockReservation, ProductImage, CatalogVersion],
+}
+
+@pytest.mark.parametrize("deploy", INTERMEDIATE_DEPLOYS)
+def test_database_started_by_an_intermediate_deploy_upgrades(migrated, deploy):
+    config, engine = migrated
+    command.upgrade(config, "0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in INTERMEDIATE_DEPLOYS[deploy]])
+
+    command.stamp(config, "0001")
+    command.upgrade(config, "head")
+    command.check(config)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET estoque = 1"))
+        assert conn.execute(text("SELECT count(*) FROM catalog_version")).scalar() == 1
+        triggers = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'products_catalog_version_%'"
+        )).scalars().all()
+    assert sorted(triggers) == ["products_catalog_version_ad", "products_catalog_version_ai", "products_catalog_version_au"]
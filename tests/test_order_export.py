@@ -0,0 +1,64 @@
+import csv
+import io
+import orjson
+from sqlalchemy import insert
+from app.models.order import Order
+from app.services import order_export
+from tests.conftest import count_checkouts, make_user
+
+def seed_orders(db, count):
+    user = make_user(db)
+    db.execute(insert(Order), [
+        {
+            "user_id": user.id, "total": 200.0, "status": "paid",
+            "endereco": {"cep": "01001000", "cidade": "São Paulo", "uf": "SP"},
+            "items": [
+                {"product_id": 1, "nome": "Vestido", "preco": 100.0, "quantidade": 1, "subtotal": 100.0},
+                {"product_id": 2, "nome": "Batom", "preco": 50.0, "quantidade": 2, "subtotal": 100.0},
+            ] if index % 2 else [],
+        }
+        for index in range(count)
+    ])
+    db.commit()
+
+def test_export_streams_one_line_per_item(client, db, admin_headers):
+    seed_orders(db, 25)
+    chunks = []
+    with client.stream("GET", "/api/admin/orders/export?formato=ndjson", headers=admin_headers) as response:
+        assert response.status_code == 200
+        chunks = list(response.iter_bytes())
+
+    lines = [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+    # 12 pedidos com 2 itens, 13 sem itens (uma linha com o item vazio)
+    assert len(lines) == 12 * 2 + 13
+    assert [line["order_id"] for line in lines] == sorted(line["order_id"] for line in lines)
+    assert lines[0]["item_index"] is None and lines[1]["item_index"] == 0
+
+def test_export_csv_header_and_filters(client, db, admin_headers):
+    seed_orders(db, 4)
+    response = client.get("/api/admin/orders/export?status=cancelled", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows == [order_export.EXPORT_COLUMNS]
+
+def test_export_requires_admin(client, user_headers):
+    assert client.get("/api/admin/orders/export", headers=user_headers).status_code == 403
+
+def test_auth_connection_is_released_before_streaming(client, db, admin_headers, monkeypatch):
+    seed_orders(db, 5)
+    during_stream = []
+    flatten = order_export.flatten_order
+
+    def recording_flatten(row):
+        during_stream.append(stats["open"])
+        return flatten(row)
+
+    monkeypatch.setattr(order_export, "flatten_order", recording_flatten)
+    # Principal fora do cache: a autenticação vai ao banco
+    with count_checkouts() as stats:
+        response = client.get("/api/admin/orders/export", headers=admin_headers)
+
+    assert response.status_code == 200
+    # Durante o streaming só a conexão do próprio export fica emprestada
+    assert during_stream and max(during_stream) == 1
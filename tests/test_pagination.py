@@ -0,0 +1,60 @@
+from app.models.order import Order
+from tests.conftest import make_product, make_user
+
+def walk(client, url):
+    """Segue os cursores até o fim; devolve os ids na ordem em que vieram"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        page_url = url + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(page_url)
+        assert response.status_code == 200
+        body = response.json()
+        ids += [row["id"] for row in body["data"]]
+        pages += 1
+        cursor = body.get("next_cursor")
+        if not cursor:
+            return ids, pages
+
+def test_product_pages_follow_the_cursor_without_gaps_or_repeats(client, db):
+    # Mesmo segundo de created_at para todos: o desempate é o id
+    products = [make_product(db, nome=f"Produto {index}") for index in range(7)]
+
+    ids, pages = walk(client, "/api/produtos/?limit=2")
+    assert ids == [p.id for p in products]
+    assert pages == 4
+
+def make_order(db, user, **values):
+    values = {"endereco": {}, "items": [], "total": 10.0, "status": "pending", **values}
+    order = Order(user_id=user.id, **values)
+    db.add(order)
+    db.commit()
+    return order
+
+def walk_orders(client, url, headers):
+    ids, cursor = [], None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+def test_order_pages_walk_newest_first(client, db, user, user_headers):
+    orders = [make_order(db, user, total=10.0 + index) for index in range(5)]
+    make_order(db, make_user(db, email="outro@example.com"))
+
+    ids = walk_orders(client, "/api/orders/?limit=2", user_headers)
+    assert ids == [o.id for o in reversed(orders)]
+
+def test_order_summary_fields(client, db, user, user_headers):
+    order = make_order(db, user, status="paid", items=[{"product_id": 1}, {"product_id": 2}])
+
+    full = client.get("/api/orders/", headers=user_headers).json()
+    assert set(full[0]) == {"id", "total", "status", "created_at", "item_count"}
+    assert full[0]["item_count"] == 2
+
+    response = client.get("/api/orders/?fields=id,item_count", headers=user_headers)
+    assert response.json() == [{"id": order.id, "item_count": 2}]
+    # Só as colunas do resumo: items/endereco ficam no detalhe
+    assert client.get("/api/orders/?fields=id,items", headers=user_headers).status_code == 400
@@ -0,0 +1,62 @@
+import base64
+import io
+import pytest
+from PIL import Image
+from app.models.product_image import ProductImage
+from app.services import product_images
+from app.services.image_pipeline import image_pipeline
+from app.services.product_images import backfill_variants, load_source, view_images
+from tests.conftest import make_product
+
+def jpeg_data_url(color="red") -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="JPEG")
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+def test_view_images_leaves_webp_empty_without_a_variant():
+    variants = {1: {"card": {"jpg": "/api/blobs/b.card.jpg", "webp": "/api/blobs/b.card.webp"}}}
+
+    jpgs, webps = view_images(["data:image/jpeg;base64,AAAA", "https://cdn/b.jpg"], variants, "card")
+    assert jpgs == ["data:image/jpeg;base64,AAAA", "/api/blobs/b.card.jpg"]
+    assert webps == [None, "/api/blobs/b.card.webp"]
+
+def test_download_stops_at_the_byte_cap(stub, monkeypatch):
+    monkeypatch.setattr(product_images, "PRODUCT_IMAGE_MAX_BYTES", 256 * 1024)
+    total = 64 * 1024 * 1024
+    stub.routes["/huge.jpg"] = (200, lambda: (b"x" * 65536 for _ in range(total // 65536)), 0)
+
+    with pytest.raises(ValueError):
+        load_source(f"{stub.url}/huge.jpg")
+    assert stub.sent < total
+
+def test_declared_length_over_the_cap_is_refused(stub, monkeypatch):
+    monkeypatch.setattr(product_images, "PRODUCT_IMAGE_MAX_BYTES", 1024)
+    stub.routes["/big.jpg"] = (200, b"x" * 4096, 0)
+    stub.routes["/small.jpg"] = (200, b"x" * 512, 0)
+
+    with pytest.raises(ValueError):
+        load_source(f"{stub.url}/big.jpg")
+    assert load_source(f"{stub.url}/small.jpg") == b"x" * 512
+
+def test_oversized_data_url_is_refused_before_decoding(monkeypatch):
+    monkeypatch.setattr(product_images, "PRODUCT_IMAGE_MAX_BYTES", 10)
+    with pytest.raises(ValueError):
+        load_source("data:image/jpeg;base64," + "A" * 100)
+
+@pytest.fixture
+def pipeline():
+    yield image_pipeline
+    image_pipeline.shutdown()
+
+def test_backfill_generates_missing_variants_once(client, db, pipeline):
+    product = make_product(db, imagens=[jpeg_data_url("red"), jpeg_data_url("blue")])
+    make_product(db, nome="Sem imagem", imagens=[])
+
+    assert backfill_variants() == (1, 2)
+    assert db.query(ProductImage).filter(ProductImage.product_id == product.id).count() == 2
+    # Tudo gerado: a segunda rodada não encontra nada
+    assert backfill_variants() == (0, 0)
+
+    data = client.get("/api/produtos/").json()["data"]
+    card = next(p for p in data if p["id"] == product.id)
+    assert all(url.endswith(".card.webp") for url in card["imagens_webp"])
@@ -0,0 +1,31 @@
+from app.models.cart import CartItem
+from app.services.cart_pricing import CartPricingService
+from app.services.catalog_cache import catalog_cache
+from tests.conftest import count_queries, make_product
+
+def listing_queries(client, limit):
+    catalog_cache.invalidate()
+    with count_queries() as executed:
+        response = client.get(f"/api/produtos/?limit={limit}")
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == limit
+    return len(executed)
+
+def test_product_listing_query_count_does_not_grow_with_page_size(client, db):
+    for index in range(40):
+        make_product(db, nome=f"Produto {index}", imagens=[f"https://cdn.example.com/{index}.jpg"])
+
+    counts = {limit: listing_queries(client, limit) for limit in (2, 10, 40)}
+    # Versão do catálogo, produtos e variantes das imagens: três queries em qualquer tamanho de página
+    assert set(counts.values()) == {3}, counts
+
+def test_cart_is_priced_with_one_query_regardless_of_size(db, user):
+    products = [make_product(db, nome=f"Produto {index}") for index in range(20)]
+    for size in (1, 5, 20):
+        db.query(CartItem).delete()
+        db.add_all(CartItem(user_id=user.id, product_id=p.id, quantidade=1) for p in products[:size])
+        db.commit()
+
+        pricing = CartPricingService.price_cart(db, user.id)
+        assert len(pricing.items) == size
+        assert pricing.query_count == 1
@@ -0,0 +1,86 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import insert, select, text
+from app.database import engine
+from tests.conftest import make_user
+from app.models.cart import CartItem
+from app.models.order import Order
+from app.models.product import Product
+from app.pagination import apply_keyset, encode_cursor
+from app.routers.orders import summary_statement
+from app.services.search import ProductSearch
+
+# Queries quentes e o índice que cada uma tem que usar (revisões 0003 e 0007).
+# Um índice removido ou um filtro que deixe de casar com o WHERE parcial
+# volta a varrer a tabela e quebra o teste.
+CURSOR = encode_cursor(datetime(2026, 1, 1, 12, 0, 0), 10)
+ACTIVE = select(Product).where(Product.is_active == True)
+HOT_QUERIES = {
+    "listagem": (
+        apply_keyset(ACTIVE, CURSOR, Product.created_at, Product.id).limit(51),
+        "ix_products_active_created",
+    ),
+    "categoria": (
+        apply_keyset(ACTIVE.where(Product.categoria == "Feminina"), CURSOR, Product.created_at, Product.id).limit(51),
+        "ix_products_active_categoria_created",
+    ),
+    "promocao": (
+        apply_keyset(ACTIVE.where(Product.promocao == True), None, Product.created_at, Product.id).limit(11),
+        "ix_products_active_promocao_created",
+    ),
+    "meus_pedidos": (
+        apply_keyset(summary_statement(1), CURSOR, Order.created_at, Order.id, descending=True).limit(21),
+        "ix_orders_user_created",
+    ),
+}
+
+@pytest.fixture(autouse=True)
+def catalog(db):
+    # Distribuição parecida com a de produção (poucos em promoção, alguns
+    # desativados): o ANALYZE dá ao planner estatísticas que não dependem da
+    # ordem dos testes
+    categorias = ["Feminina", "Masculina", "Cosméticos", "Bijuterias"]
+    db.execute(insert(Product), [
+        {"nome": f"Produto {i}", "preco": 10.0, "categoria": categorias[i % 4], "estoque": 5,
+         "promocao": i % 20 == 0, "is_active": i % 10 != 0}
+        for i in range(400)
+    ])
+    users = [make_user(db, email=f"cliente{i}@example.com") for i in range(20)]
+    db.execute(insert(Order), [
+        {"user_id": users[i % 20].id, "total": 10.0, "endereco": {}, "items": []}
+        for i in range(200)
+    ])
+    db.commit()
+
+def explain(statement):
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # Tabelas de teste são pequenas: sem isto o planner prefere o seq scan
+            conn.execute(text("SET enable_seqscan = off"))
+            return "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + sql)))
+        conn.execute(text("ANALYZE"))
+        return "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_its_index(name):
+    statement, index = HOT_QUERIES[name]
+    plan = explain(statement)
+    assert index in plan, plan
+    # A ordem sai do índice, sem sort extra
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan, plan
+
+def test_cart_lookup_uses_the_unique_constraint():
+    plan = explain(select(CartItem).where(CartItem.user_id == 1, CartItem.product_id == 2))
+    if engine.dialect.name == "postgresql":
+        assert "uq_cart_items_user_product" in plan, plan
+    else:
+        # SQLite dá nome próprio ao índice da constraint
+        assert "USING INDEX sqlite_autoindex_cart_items" in plan, plan
+
+def test_search_uses_the_text_index():
+    plan = explain(ProductSearch.apply(ACTIVE, "vestido", engine.dialect.name).limit(50))
+    if engine.dialect.name == "postgresql":
+        assert "ix_products_search_vector" in plan, plan
+    else:
+        assert "VIRTUAL TABLE INDEX" in plan, plan
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.outbox import PaymentOutbox
+from app.models.webhook_inbox import WebhookInbox
+from app.services import payment_outbox, webhook_inbox
+
+WORKERS = 4
+
+def claim_in_parallel(claim_due, limit):
+    """Cada worker com a própria sessão, todos reivindicando ao mesmo tempo"""
+    barrier = threading.Barrier(WORKERS)
+
+    def worker(_):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            return claim_due(db, limit)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(WORKERS) as pool:
+        return list(pool.map(worker, range(WORKERS)))
+
+def outbox_entries(db, user, count, due=True):
+    now = datetime.utcnow()
+    entries = []
+    for index in range(count):
+        order = Order(user_id=user.id, items=[], endereco={}, total=10.0)
+        entries.append(PaymentOutbox(
+            order=order, payload={}, status="pending", attempts=0,
+            next_attempt_at=now - timedelta(seconds=index + 1) if due else now + timedelta(hours=1)
+        ))
+    db.add_all(entries)
+    db.commit()
+    return [entry.id for entry in entries]
+
+def inbox_entries(db, count, payments=3):
+    now = datetime.utcnow()
+    entries = [
+        WebhookInbox(
+            dedupe_key=f"payment:{index}", topic="payment", resource_id=str(index % payments),
+            payload={}, status="pending", attempts=0, next_attempt_at=now - timedelta(seconds=index + 1)
+        )
+        for index in range(count)
+    ]
+    db.add_all(entries)
+    db.commit()
+    return [entry.id for entry in entries]
+
+def test_concurrent_outbox_workers_never_share_an_entry(db, user):
+    ids = outbox_entries(db, user, 30)
+
+    claims = claim_in_parallel(payment_outbox.claim_due, 10)
+    claimed = [entry_id for claim in claims for entry_id in claim]
+    assert len(claimed) == len(set(claimed))
+    assert set(claimed) <= set(ids)
+    # Sem ninguém processar, o que sobrou continua na fila para o próximo lote
+    assert sorted(claimed + payment_outbox.claim_due(db, 30)) == sorted(ids)
+
+def test_concurrent_inbox_workers_never_share_an_entry(db):
+    ids = inbox_entries(db, 30)
+
+    claims = claim_in_parallel(webhook_inbox.claim_due, 10)
+    claimed = [entry_id for groups in claims for group in groups.values() for entry_id in group]
+    assert len(claimed) == len(set(claimed))
+    for groups in claims:
+        for resource_id, group in groups.items():
+            assert {db.get(WebhookInbox, entry_id).resource_id for entry_id in group} == {resource_id}
+    rest = [entry_id for group in webhook_inbox.claim_due(db, 30).values() for entry_id in group]
+    assert sorted(claimed + rest) == sorted(ids)
+
+@pytest.mark.parametrize("queue", ["outbox", "inbox"])
+def test_expired_lease_is_reclaimed(db, user, queue):
+    if queue == "outbox":
+        model, claim_due = PaymentOutbox, payment_outbox.claim_due
+        [entry_id] = outbox_entries(db, user, 1)
+        claimed = lambda: claim_due(db, 10)
+    else:
+        model, claim_due = WebhookInbox, webhook_inbox.claim_due
+        [entry_id] = inbox_entries(db, 1)
+        claimed = lambda: [i for group in claim_due(db, 10).values() for i in group]
+
+    assert claimed() == [entry_id]
+    # Lease ativo: outro worker não pega
+    assert claimed() == []
+
+    # O worker morreu no meio: o lease vence e a entrada volta à fila
+    db.query(model).filter(model.id == entry_id).update(
+        {"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+    )
+    db.commit()
+    assert claimed() == [entry_id]
+    db.expire_all()
+    entry = db.get(model, entry_id)
+    assert entry.status == "processing"
+    assert entry.next_attempt_at > datetime.utcnow()
+
+def test_entries_not_due_are_left_alone(db, user):
+    outbox_entries(db, user, 3, due=False)
+    assert payment_outbox.claim_due(db, 10) == []
+
+@pytest.mark.parametrize("body", [
+    {"action": "test.created", "type": "payment", "data": {}},
+    {"type": "merchant_order", "data": {"id": "123"}},
+    {"type": "payment", "data": {"id": None}},
+    {"type": "payment"},
+    ["payment"],
+])
+def test_webhook_without_payment_id_is_ignored(client, db, body):
+    # Pings de teste e outros tópicos: 200 (o Mercado Pago não reenvia) e nada no inbox
+    response = client.post("/api/webhook/mercadopago", json=body)
+    assert response.status_code == 200
+    assert db.query(WebhookInbox).count() == 0
+
+def test_webhook_payment_is_stored_once(client, db):
+    body = {"id": 42, "type": "payment", "action": "payment.updated", "data": {"id": 987}}
+    for _ in range(2):
+        assert client.post("/api/webhook/mercadopago", json=body).status_code == 200
+    assert [(entry.resource_id, entry.dedupe_key) for entry in db.query(WebhookInbox)] == [("987", "payment:42")]
+
+def test_webhook_rejects_a_body_that_is_not_json(client, db):
+    response = client.post("/api/webhook/mercadopago", content=b"not json", headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert db.query(WebhookInbox).count() == 0
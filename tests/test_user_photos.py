@@ -0,0 +1,45 @@
+import asyncio
+import io
+import pytest
+from PIL import Image
+from sqlalchemy import event
+from app.database import engine
+from app.models.user import User
+from app.services.blob_store import BlobStore
+
+def png_bytes(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 90)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def test_upload_foto_writes_the_user_off_the_event_loop(client, db, user, user_headers):
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE users"):
+            writes.append(on_event_loop())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post(
+            "/api/usuario/upload-foto", headers=user_headers,
+            files={"file": ("foto.png", png_bytes(), "image/png")}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert writes == [False]
+    db.expire_all()
+    assert db.get(User, user.id).foto == response.json()["data"]["foto"]
+
+def test_blob_store_is_abstract():
+    with pytest.raises(TypeError):
+        BlobStore()
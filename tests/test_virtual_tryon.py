@@ -0,0 +1,26 @@
+import base64
+import io
+from PIL import Image
+from app.routers import virtual_tryon
+
+def png_bytes(size):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 90)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_upload_is_resized_to_jpeg(client, user_headers):
+    response = client.post(
+        "/api/virtual-tryon/upload", headers=user_headers,
+        files={"file": ("foto.png", png_bytes((2048, 1024)), "image/png")}
+    )
+    assert response.status_code == 200
+    image = Image.open(io.BytesIO(base64.b64decode(response.json()["image_data"])))
+    assert (image.format, image.size) == ("JPEG", (1024, 512))
+
+def test_upload_over_the_limit_is_rejected(client, user_headers, monkeypatch):
+    monkeypatch.setattr(virtual_tryon, "TRYON_MAX_UPLOAD_BYTES", 1024)
+    response = client.post(
+        "/api/virtual-tryon/upload", headers=user_headers,
+        files={"file": ("foto.png", png_bytes((512, 512)), "image/png")}
+    )
+    assert response.status_code == 413